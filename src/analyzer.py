@@ -3,9 +3,10 @@ import sys
 import os
 from pathlib import Path
 import polars as pl
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import time
 import datetime
+import gc
 
 current_dir = Path(__file__).resolve().parent
 sys.path.append(current_dir.as_posix())
@@ -13,7 +14,9 @@ sys.path.append(current_dir.as_posix())
 # Importar funciones de los módulos E, T y L
 from extractor import extract_from_file
 from transformer import apply_transformation
-from loader import apply_loading 
+from loader import apply_loading, CLEAN_DATA_PATH
+from memory_governor import MemoryGovernor
+from stage_pipeline import run_pipelined
 
 
 # RUTA ABSOLUTA DE LOS DATOS FUENTE (Unidad de red Z:)
@@ -37,30 +40,29 @@ TABLES_TO_PROCESS: List[str] = [
     # 'PAGO_PORTAL', 'CTGIROS', 'CTOFICINAS', 'CTTIPOSOCIEDAD'
 ]
 
+# Guardar los CLOBs excluidos (DSOBJETO, DSFIRMA, ...) en el sidecar data/clob_sidecar
+EXTRACT_CLOB_SIDECAR = True
+
+# Presupuesto de memoria (RSS) para la corrida completa; ver memory_governor.py
+MEMORY_BUDGET_BYTES = 24 * 1024 ** 3
+
+# Ejecución segmentada: E, T, L1 y L2 corren en paralelo por bloques (ver stage_pipeline.py).
+# Es el único modo en que la memoria queda acotada; el secuencial mantiene la tabla completa.
+PIPELINED_EXECUTION = False
+
 # LÓGICA DE ANÁLISIS DE CALIDAD DE DATOS (EDA)
 
 
-def analyze_data_quality(df: pl.DataFrame, table_name: str, reports_dir: Path):
+def write_quality_report(table_name: str, column_stats: List[Tuple[str, str, int]], total_rows: int,
+                         reports_dir: Path) -> pl.DataFrame:
     """
-    Realiza un análisis básico de calidad de datos (nulos, tipos)
-    y genera un reporte CSV.
+    Genera el reporte CSV de calidad a partir de (columna, tipo, nulos) por columna
+    y lo devuelve como DataFrame.
     """
-    print(f"\n--- INICIANDO ANÁLISIS DE CALIDAD DE DATOS para {table_name} ---")
-    
-    # 1. Conteo de Valores Nulos
-    print("[1] Conteo de Valores Nulos (Calidad de Datos):")
-    
     # Calcular métricas de calidad
     null_counts = []
-    total_rows = df.shape[0]
     
-    for col in df.columns:
-        # Contar nulos
-        null_count = df[col].is_null().sum()
-        
-        # Obtener el tipo de dato
-        dtype = str(df[col].dtype)
-        
+    for col, dtype, null_count in column_stats:
         # Calcular porcentaje
         if total_rows > 0:
             null_percentage = (null_count / total_rows)
@@ -89,42 +91,88 @@ def analyze_data_quality(df: pl.DataFrame, table_name: str, reports_dir: Path):
     
     print(f"Reporte generado. Filas: {total_rows}")
     print(f"✅ Reporte EDA generado: {report_path.name}")
+    return report_df
+
+
+def analyze_data_quality(df: pl.DataFrame, table_name: str, reports_dir: Path) -> pl.DataFrame:
+    """
+    Realiza un análisis básico de calidad de datos (nulos, tipos),
+    genera un reporte CSV y devuelve el reporte como DataFrame.
+    """
+    print(f"\n--- INICIANDO ANÁLISIS DE CALIDAD DE DATOS para {table_name} ---")
+    
+    # 1. Conteo de Valores Nulos
+    print("[1] Conteo de Valores Nulos (Calidad de Datos):")
+    
+    column_stats = [(col, str(df[col].dtype), df[col].is_null().sum()) for col in df.columns]
+    report_df = write_quality_report(table_name, column_stats, df.shape[0], reports_dir)
+    
     print(f"| ✅ EDA finalizado para {table_name}.")
+    return report_df
+
+def preview_data_quality(table_name: str, n_rows: int = 10_000, mode: str = 'stratified') -> pl.DataFrame:
+    """
+    Perfil EDA rápido sobre una muestra aleatoria de todo el archivo fuente (ver
+    extractor.sample_from_file). El reporte se guarda como '<TABLA>_MUESTRA'.
+    """
+    df = extract_from_file(table_name, ROOT_DATA_PATH, limit=n_rows, sample=mode)
+    df = apply_transformation(table_name, df)
+    return analyze_data_quality(df, f"{table_name}_MUESTRA", REPORTS_DIR)
 
 # ==============================================================================
 # FUNCIÓN PRINCIPAL DEL PIPELINE
 # ==============================================================================
 
-def main():
+def main(pipelined: bool = PIPELINED_EXECUTION):
     """Ejecuta el pipeline E-T-L-EDA para todas las tablas."""
     print("--- INICIANDO PIPELINE ETL Y QA ---")
+    governor = MemoryGovernor(MEMORY_BUDGET_BYTES)
     
     for table_name in TABLES_TO_PROCESS:
         
         print("\n" + "=" * 55)
         print(f"| 📊 Procesando Tabla: {table_name}")
         print("=" * 55)
+
+        # No se pausa: la tabla arranca de inmediato y, si la memoria sigue sobre el
+        # umbral, con bloques reducidos
+        governor.admit_without_waiting(table_name)
+        df = None
         
         try:
-            # 1. Extracción (E)
-            df = extract_from_file(table_name, ROOT_DATA_PATH, ANOMALIES_DIR)
+            if pipelined:
+                # E-T-L en paralelo por bloques; el EDA usa el perfil acumulado en T
+                column_stats, total_rows = run_pipelined(
+                    table_name, ROOT_DATA_PATH, CLEAN_DATA_PATH, EXTRACT_CLOB_SIDECAR, governor,
+                )
+                print(f"\n--- INICIANDO ANÁLISIS DE CALIDAD DE DATOS para {table_name} ---")
+                write_quality_report(table_name, column_stats, total_rows, REPORTS_DIR)
+                print(f"| ✅ EDA finalizado para {table_name}.")
+            else:
+                # 1. Extracción (E)
+                df = extract_from_file(table_name, ROOT_DATA_PATH, extract_clobs=EXTRACT_CLOB_SIDECAR, governor=governor)
             
-            # 2. Transformación (T)
-            print(f"--- INICIANDO TRANSFORMACIÓN para {table_name} ---")
-            df = apply_transformation(table_name, df)
-            print("--- TRANSFORMACIÓN FINALIZADA ---")
+                # 2. Transformación (T)
+                print(f"--- INICIANDO TRANSFORMACIÓN para {table_name} ---")
+                df = apply_transformation(table_name, df, governor)
+                print("--- TRANSFORMACIÓN FINALIZADA ---")
 
-            # 3. Carga (L) - L1 (Parquet) y L2 (SQL Server)
-            apply_loading(table_name, df) 
+                # 3. Carga (L) - L1 (Parquet) y L2 (SQL Server)
+                apply_loading(table_name, df, governor) 
 
-            # 4. Análisis Exploratorio de Datos (EDA)
-            analyze_data_quality(df, table_name, REPORTS_DIR)
+                # 4. Análisis Exploratorio de Datos (EDA)
+                analyze_data_quality(df, table_name, REPORTS_DIR)
 
         except Exception as e:
             print(f"| ❌ FALLO CRÍTICO en el Pipeline para {table_name}. Mensaje:")
             print(f"'{e}'")
             print("=" * 55)
 
+        # Liberar la tabla antes de pasar a la siguiente
+        del df
+        gc.collect()
+
+    governor.report()
     print("\n--- PIPELINE COMPLETO FINALIZADO ---")
 
 if __name__ == '__main__':
@@ -0,0 +1,184 @@
+# --- INICIO DEL ARCHIVO src/audit_query.py ---
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+import polars as pl
+
+# ==============================================================================
+# CONFIGURACIÓN
+# ==============================================================================
+BASE_DIR = Path(__file__).resolve().parent.parent
+CLEAN_DATA_DIR = BASE_DIR / 'data' / 'clean_data'
+AUDIT_CACHE_DIR = BASE_DIR / 'data' / 'cache' / 'audit'
+
+# Agregados frecuentes de auditoría: (tabla, columnas de agrupación)
+COMMON_AGGREGATES: Dict[str, List[str]] = {
+    'caratulas_por_estado': ['MVCARATULAS', 'LLESTADO'],
+    'caratulas_por_oficina': ['MVCARATULAS', 'LLOFICINA'],
+    'caratulas_por_estatus': ['MVCARATULAS', 'LLESTATUSCARATULA'],
+}
+
+
+# ==============================================================================
+# REGISTRO DEL LAGO PARQUET
+# ==============================================================================
+
+def register_tables(clean_dir: Path = CLEAN_DATA_DIR) -> Dict[str, pl.LazyFrame]:
+    """
+    Registra cada '<TABLA>.parquet' como un escaneo lazy. Nada se lee hasta
+    ejecutar la consulta; Polars solo lee las columnas y row groups necesarios
+    (projection/predicate pushdown).
+    """
+    tables = {path.stem: pl.scan_parquet(path.as_posix()) for path in sorted(clean_dir.glob('*.parquet'))}
+    if not tables:
+        raise FileNotFoundError(f"No se encontraron archivos Parquet en {clean_dir.as_posix()}")
+    return tables
+
+
+def _table_fingerprint(table_name: str, clean_dir: Path) -> Dict[str, int]:
+    stat = (clean_dir / f"{table_name}.parquet").stat()
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def _referenced_tables(sql: str, tables: Dict[str, pl.LazyFrame]) -> List[str]:
+    """Tablas registradas que aparecen en la consulta SQL."""
+    return [name for name in tables if re.search(rf"\b{re.escape(name)}\b", sql, re.IGNORECASE)]
+
+
+# ==============================================================================
+# CACHÉ DE RESULTADOS
+# ==============================================================================
+# Cada resultado se guarda como <hash>.parquet junto con <hash>.json, que registra
+# la huella (tamaño + fecha de modificación) de los Parquet de los que depende.
+# Si alguno de esos Parquet cambia, la entrada se invalida y se elimina.
+
+def _cache_paths(query_id: str, fingerprints: Dict[str, Dict[str, int]], cache_dir: Path):
+    key_material = json.dumps({'query': query_id, 'tables': fingerprints}, sort_keys=True)
+    digest = hashlib.sha256(key_material.encode('utf-8')).hexdigest()[:20]
+    return cache_dir / f"{digest}.parquet", cache_dir / f"{digest}.json"
+
+
+def prune_stale_cache(clean_dir: Path = CLEAN_DATA_DIR, cache_dir: Path = AUDIT_CACHE_DIR) -> int:
+    """Elimina las entradas cuyo Parquet de origen cambió o ya no existe."""
+    removed = 0
+    for meta_path in cache_dir.glob('*.json'):
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        try:
+            stale = any(
+                _table_fingerprint(table, clean_dir) != fingerprint
+                for table, fingerprint in meta['tables'].items()
+            )
+        except FileNotFoundError:
+            stale = True
+        if stale:
+            meta_path.with_suffix('.parquet').unlink(missing_ok=True)
+            meta_path.unlink()
+            removed += 1
+    return removed
+
+
+def _cached_collect(query_id: str, table_names: List[str], lf: pl.LazyFrame, use_cache: bool,
+                    clean_dir: Path, cache_dir: Path) -> pl.DataFrame:
+    fingerprints = {name: _table_fingerprint(name, clean_dir) for name in table_names}
+    result_path, meta_path = _cache_paths(query_id, fingerprints, cache_dir)
+
+    if use_cache and result_path.exists():
+        print(f"  -> ♻️ Resultado en caché ({result_path.stem}).")
+        return pl.read_parquet(result_path.as_posix())
+
+    df = lf.collect()
+    if use_cache:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        df.write_parquet(result_path.as_posix(), compression="zstd")
+        meta_path.write_text(json.dumps({'query': query_id, 'tables': fingerprints}), encoding='utf-8')
+    return df
+
+
+# ==============================================================================
+# CONSULTAS
+# ==============================================================================
+
+def run_sql(sql: str, use_cache: bool = True, clean_dir: Path = CLEAN_DATA_DIR,
+            cache_dir: Path = AUDIT_CACHE_DIR) -> pl.DataFrame:
+    """Ejecuta SQL (filtros, GROUP BY, JOIN) sobre todas las tablas SIGER registradas."""
+    tables = register_tables(clean_dir)
+    ctx = pl.SQLContext(frames=tables)
+    lf = ctx.execute(sql, eager=False)
+    return _cached_collect(f"sql:{' '.join(sql.split())}", _referenced_tables(sql, tables), lf,
+                           use_cache, clean_dir, cache_dir)
+
+
+def count_by(table_name: str, columns: List[str], where: Optional[str] = None, use_cache: bool = True,
+             clean_dir: Path = CLEAN_DATA_DIR, cache_dir: Path = AUDIT_CACHE_DIR) -> pl.DataFrame:
+    """Conteo de registros por las columnas indicadas, con filtro SQL opcional."""
+    tables = register_tables(clean_dir)
+    if table_name not in tables:
+        raise ValueError(f"La tabla '{table_name}' no existe en {clean_dir.as_posix()}")
+
+    lf = tables[table_name]
+    if where:
+        lf = lf.filter(pl.sql_expr(where))
+    lf = lf.group_by(columns).agg(pl.len().alias('Total')).sort('Total', descending=True)
+
+    query_id = f"count:{table_name}:{','.join(columns)}:{where or ''}"
+    return _cached_collect(query_id, [table_name], lf, use_cache, clean_dir, cache_dir)
+
+
+# ==============================================================================
+# LÍNEA DE COMANDOS
+# ==============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Consultas de auditoría sobre el lago Parquet de SIGER.")
+    parser.add_argument('--no-cache', action='store_true', help="Ignora y no escribe la caché de resultados.")
+    parser.add_argument('--output', type=Path, help="Guarda el resultado en CSV.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('tables', help="Lista las tablas registradas y su esquema.")
+
+    p_sql = sub.add_parser('sql', help="Ejecuta una consulta SQL sobre las tablas registradas.")
+    p_sql.add_argument('query')
+
+    p_count = sub.add_parser('count', help="Conteo por columnas de una tabla.")
+    p_count.add_argument('table')
+    p_count.add_argument('columns', nargs='+')
+    p_count.add_argument('--where', help="Filtro en sintaxis SQL, p. ej. \"LLESTADO = 9\".")
+
+    p_agg = sub.add_parser('aggregate', help="Ejecuta un agregado frecuente predefinido.")
+    p_agg.add_argument('name', choices=sorted(COMMON_AGGREGATES))
+
+    args = parser.parse_args(argv)
+    use_cache = not args.no_cache
+
+    if use_cache:
+        removed = prune_stale_cache()
+        if removed:
+            print(f"  -> {removed} resultados en caché invalidados por cambios en los Parquet.")
+
+    if args.command == 'tables':
+        for name, lf in register_tables().items():
+            print(f"{name}: {dict(lf.collect_schema())}")
+        return
+
+    if args.command == 'sql':
+        df = run_sql(args.query, use_cache=use_cache)
+    elif args.command == 'count':
+        df = count_by(args.table, args.columns, where=args.where, use_cache=use_cache)
+    else:
+        table_name, *columns = COMMON_AGGREGATES[args.name]
+        df = count_by(table_name, columns, use_cache=use_cache)
+
+    with pl.Config(tbl_rows=50):
+        print(df)
+
+    if args.output:
+        df.write_csv(args.output.as_posix())
+        print(f"✅ Resultado guardado en: {args.output.as_posix()}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
+# --- FIN DEL ARCHIVO src/audit_query.py ---
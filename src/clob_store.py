@@ -0,0 +1,176 @@
+# --- INICIO DEL ARCHIVO src/clob_store.py ---
+import shutil
+import polars as pl
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+# ==============================================================================
+# CONFIGURACIÓN DEL ALMACÉN LATERAL (SIDECAR) DE CLOBs
+# ==============================================================================
+# Las columnas CLOB excluidas del DataFrame principal (ver COLUMNS_TO_EXCLUDE en
+# extractor.py) se guardan aquí, en Parquet comprimido, indexadas por la llave
+# primaria de la tabla. Cada tabla es una carpeta con archivos 'part-NNNNN.parquet'.
+# Las partes se escriben en una carpeta temporal ('_staging_<TABLA>') que solo
+# reemplaza al sidecar vigente cuando la extracción termina completa.
+BASE_DIR = Path(__file__).resolve().parent.parent
+CLOB_SIDECAR_DIR = BASE_DIR / 'data' / 'clob_sidecar'
+
+# Llave primaria con la que se vincula cada CLOB a su registro en la tabla principal
+TABLE_PRIMARY_KEYS: Dict[str, str] = {
+    'MVCARATULAS': 'LLCARATULA',
+    'DTFIRMAS': 'LLFIRMA',
+}
+
+# Filas acumuladas en memoria antes de escribir un nuevo archivo 'part'
+SIDECAR_CHUNK_ROWS = 50_000
+
+# Registros con CLOB desbordado (un '|' sin comillas dentro del texto lo partió en
+# varios campos): DESBORDADO los marca y, si la tabla tiene más de una columna CLOB
+# (no se puede saber dónde termina cada una), TEXTO_DESBORDADO guarda el tramo
+# completo y las columnas CLOB quedan nulas en lugar de guardar fragmentos.
+OVERFLOW_FLAG_COLUMN = 'DESBORDADO'
+OVERFLOW_TEXT_COLUMN = 'TEXTO_DESBORDADO'
+
+
+# ==============================================================================
+# ESCRITURA POR BLOQUES
+# ==============================================================================
+
+class ClobSidecarWriter:
+    """
+    Acumula (llave, CLOBs) fila por fila y los vuelca a Parquet cada
+    SIDECAR_CHUNK_ROWS filas, de modo que el texto largo nunca se mantiene
+    completo en memoria. El sidecar anterior solo se reemplaza en close(); si la
+    lectura falla o se interrumpe, abort() descarta lo escrito y lo conserva.
+    """
+
+    def __init__(self, table_name: str, clob_columns: List[str],
+                 key_dtype: Any = pl.Utf8, output_dir: Path = CLOB_SIDECAR_DIR,
+                 chunk_rows: int = SIDECAR_CHUNK_ROWS):
+        if table_name not in TABLE_PRIMARY_KEYS:
+            raise ValueError(f"La tabla '{table_name}' no tiene llave primaria definida para el sidecar de CLOBs.")
+
+        self.table_name = table_name
+        self.key_column = TABLE_PRIMARY_KEYS[table_name]
+        self.clob_columns = list(clob_columns)
+        self.key_dtype = key_dtype
+        self.chunk_rows = chunk_rows
+        self.output_dir = output_dir
+        self.table_dir = output_dir / table_name
+        self.closed = False
+
+        self._buffer: Dict[str, List[Any]] = {
+            c: [] for c in [self.key_column] + self.clob_columns + [OVERFLOW_FLAG_COLUMN, OVERFLOW_TEXT_COLUMN]
+        }
+        self._part = 0
+        self.total_rows = 0
+
+        # Restos de una corrida interrumpida se descartan
+        self._staging_dir = output_dir / f"_staging_{table_name}"
+        if self._staging_dir.exists():
+            shutil.rmtree(self._staging_dir)
+        self._staging_dir.mkdir(parents=True)
+
+    def add(self, key: str, clob_values: List[Optional[str]], overflowed: bool = False,
+            overflow_text: Optional[str] = None) -> None:
+        """Agrega un registro. 'clob_values' sigue el orden de 'clob_columns'."""
+        self._buffer[self.key_column].append(key)
+        for col, value in zip(self.clob_columns, clob_values):
+            self._buffer[col].append(value if value != '' else None)
+        self._buffer[OVERFLOW_FLAG_COLUMN].append(overflowed)
+        self._buffer[OVERFLOW_TEXT_COLUMN].append(overflow_text)
+
+        if len(self._buffer[self.key_column]) >= self.chunk_rows:
+            self.flush()
+
+    def add_row(self, row: List[str], key_position: int, clob_positions: List[int],
+                expected_len: int, delimiter: str) -> None:
+        """
+        Agrega un registro leído del archivo. Si trae campos de más (CLOB desbordado),
+        el tramo que cubren las columnas CLOB se vuelve a unir con el delimitador: con
+        una sola columna CLOB el valor queda exacto; con varias se guarda en
+        TEXTO_DESBORDADO.
+        """
+        extra = len(row) - expected_len
+        if extra <= 0:
+            self.add(row[key_position], [row[p] if p < len(row) else None for p in clob_positions])
+            return
+
+        first, last = min(clob_positions), max(clob_positions)
+        # Los campos después de las columnas CLOB se desplazan 'extra' posiciones
+        key = row[key_position + extra] if key_position > last else row[key_position]
+        span = delimiter.join(row[first:last + extra + 1])
+        if len(clob_positions) == 1:
+            self.add(key, [span], overflowed=True)
+        else:
+            self.add(key, [None] * len(clob_positions), overflowed=True, overflow_text=span)
+
+    def flush(self) -> None:
+        """Escribe el bloque acumulado como un nuevo archivo Parquet."""
+        n_rows = len(self._buffer[self.key_column])
+        if n_rows == 0:
+            return
+
+        chunk = pl.DataFrame(
+            self._buffer,
+            schema={c: pl.Boolean if c == OVERFLOW_FLAG_COLUMN else pl.Utf8 for c in self._buffer},
+        ).with_columns(
+            pl.col(self.key_column).str.strip_chars().cast(self.key_dtype, strict=False)
+        )
+        part_path = self._staging_dir / f"part-{self._part:05d}.parquet"
+        chunk.write_parquet(part_path.as_posix(), compression="zstd")
+
+        self._part += 1
+        self.total_rows += n_rows
+        self._buffer = {c: [] for c in self._buffer}
+
+    def close(self) -> None:
+        """Vacía el último bloque pendiente y reemplaza el sidecar anterior por el nuevo."""
+        self.flush()
+
+        old_dir = self.output_dir / f"_old_{self.table_name}"
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        if self.table_dir.exists():
+            self.table_dir.rename(old_dir)
+        self._staging_dir.rename(self.table_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        self.closed = True
+
+        print(f"  -> ✅ Sidecar CLOB: {self.total_rows} filas de {self.clob_columns} guardadas en {self.table_dir.as_posix()}")
+
+    def abort(self) -> None:
+        """Descarta las partes escritas; el sidecar vigente queda intacto."""
+        if not self.closed:
+            shutil.rmtree(self._staging_dir, ignore_errors=True)
+            self.closed = True
+
+
+# ==============================================================================
+# CONSULTA PEREZOSA (LAZY)
+# ==============================================================================
+
+def scan_clobs(table_name: str, output_dir: Path = CLOB_SIDECAR_DIR) -> pl.LazyFrame:
+    """Registra el sidecar de la tabla como un escaneo lazy de Polars."""
+    table_dir = output_dir / table_name
+    if not any(table_dir.glob('part-*.parquet')):
+        raise FileNotFoundError(f"No existe sidecar de CLOBs para '{table_name}' en {table_dir.as_posix()}")
+    return pl.scan_parquet((table_dir / 'part-*.parquet').as_posix())
+
+
+def lookup_clobs(table_name: str, keys: List[Any], columns: Optional[List[str]] = None,
+                 output_dir: Path = CLOB_SIDECAR_DIR) -> pl.DataFrame:
+    """
+    Devuelve los CLOBs de los registros indicados por su llave primaria.
+    Solo se leen las columnas solicitadas (projection pushdown) y los row groups
+    que contienen las llaves (predicate pushdown). Las columnas de desbordamiento
+    se incluyen siempre, para no presentar como completo un texto que no lo es.
+    """
+    key_column = TABLE_PRIMARY_KEYS[table_name]
+    lf = scan_clobs(table_name, output_dir)
+    if columns:
+        extra_columns = [OVERFLOW_FLAG_COLUMN, OVERFLOW_TEXT_COLUMN]
+        lf = lf.select([key_column] + [c for c in columns if c not in [key_column] + extra_columns] + extra_columns)
+    return lf.filter(pl.col(key_column).is_in(keys)).collect()
+
+# --- FIN DEL ARCHIVO src/clob_store.py ---
@@ -7,7 +7,13 @@ from datetime import datetime
 import csv
 import io 
 import re 
-from typing import Dict, List, Optional, Any
+import random
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+from clob_store import ClobSidecarWriter, TABLE_PRIMARY_KEYS
+from memory_governor import MemoryGovernor
+from tar_source import SourceFile, split_archive_path, find_table_member
+from hybrid_reader import read_hybrid, iter_hybrid_frames, iter_byte_ranges, HYBRID_RANGE_BYTES
 
 # ==============================================================================
 # CONFIGURACIÓN CRÍTICA: LÍMITE DE CAMPO CSV
@@ -60,6 +66,29 @@ SCHEMA_OVERRIDES: Dict[str, Dict[str, pl.DataType]] = {
     }
 }
 
+# Filas limpias que se acumulan antes de convertirlas a Polars en la ruta manual
+# (el gobernador de memoria las reduce si el RSS se acerca al presupuesto)
+MANUAL_BATCH_ROWS = 250_000
+
+# Modo de muestreo: filas por defecto y líneas máximas a descartar al buscar el
+# inicio de un registro tras un salto aleatorio (o que puede ocupar un registro)
+DEFAULT_SAMPLE_ROWS = 10_000
+SAMPLE_MAX_RESYNC_LINES = 50
+SAMPLE_MAX_RECORD_LINES = 200
+SAMPLE_MODES = ('uniform', 'stratified')
+
+# Muestreo con rechazo: saltos por fila pendiente en la primera ronda (se duplican
+# en cada ronda hasta SAMPLE_MAX_OVERSAMPLE), rondas máximas para completar la
+# muestra, y ventana inicial (bytes) para buscar hacia atrás el registro anterior
+SAMPLE_OVERSAMPLE = 4
+SAMPLE_MAX_OVERSAMPLE = 256
+SAMPLE_MAX_ROUNDS = 12
+SAMPLE_BACKTRACK_BYTES = 4096
+
+# Lector híbrido (nativo + respaldo en Python + cuarentena) para las tablas con
+# encabezado manual, en lugar de 'ignore_errors=True'. Ver hybrid_reader.py
+USE_HYBRID_READER = True
+
 # Tablas que requieren manejo manual del encabezado
 TABLES_REQUIRING_MANUAL_HEADER = [
     'MVSOLICITUDES', 'MVCARATULAS', 'CTSOCIOS', 'MVFRMACTO', 
@@ -70,8 +99,15 @@ TABLES_REQUIRING_MANUAL_HEADER = [
 # FUNCIONES DE UTILIDAD 
 # ==============================================================================
 
-def get_file_paths(table_name: str, root_path: Path) -> Optional[Path]:
-    """Busca el archivo de datos (.csv o .txt) para la tabla dada."""
+def get_file_paths(table_name: str, root_path: Path) -> Optional[SourceFile]:
+    """
+    Busca el archivo de datos (.csv o .txt) para la tabla dada. Si 'root_path'
+    pasa por un .tar/.tar.gz, devuelve el miembro correspondiente del archivo.
+    """
+    archive = split_archive_path(root_path)
+    if archive:
+        return find_table_member(table_name, *archive)
+
     file_path_csv = root_path / f"{table_name}.csv"
     file_path_txt = root_path / f"{table_name}.txt"
     if file_path_csv.exists():
@@ -80,34 +116,287 @@ def get_file_paths(table_name: str, root_path: Path) -> Optional[Path]:
         return file_path_txt
     return None 
 
-def sample_problematic_lines(file_path: Path, n_lines=10):
-    """Muestra las primeras N líneas del archivo para inspección manual en caso de fallo."""
+def sample_problematic_lines(file_path: SourceFile, n_lines=10, n_random=5):
+    """
+    Muestra las primeras N líneas del archivo, y N_RANDOM líneas tomadas en
+    posiciones aleatorias de todo el archivo, para inspección manual en caso de fallo.
+    """
     print(f"\n--- MUESTRA DE LAS PRIMERAS {n_lines} LÍNEAS PARA INSPECCIÓN ({file_path.name}) ---")
     try:
         # Uso de'latin1' 
-        with open(file_path, 'rb') as f_bin:
+        with file_path.open('rb') as f_bin:
              f = io.TextIOWrapper(f_bin, encoding='latin1', newline='')
              for i in range(n_lines):
                  line = f.readline()
                  if not line:
                      break
                  print(f"[{i+1}]: {line.strip()[:150]}...") 
+
+        if n_random:
+            print(f"--- {n_random} LÍNEAS EN POSICIONES ALEATORIAS ---")
+            file_size = file_path.stat().st_size
+            with file_path.open('rb') as f_bin:
+                for offset in sorted(random.randrange(file_size) for _ in range(n_random)):
+                    f_bin.seek(offset)
+                    f_bin.readline()  # Descartar la línea parcial
+                    line_offset = f_bin.tell()
+                    line = f_bin.readline().decode('latin1')
+                    if line:
+                        print(f"[byte {line_offset}]: {line.strip()[:150]}...")
     except Exception as e:
         print(f"Error al leer la muestra: {e}")
     print("----------------------------------------------------------------------\n")
 
 
+# ==============================================================================
+# MODO DE MUESTREO ALEATORIO (VISTA PREVIA RÁPIDA DE ARCHIVOS ENORMES)
+# ==============================================================================
+
+def _decoded_lines(f_bin: io.BufferedReader, max_lines: int) -> Iterator[str]:
+    """Líneas decodificadas desde la posición actual, con tope para no recorrer el archivo."""
+    for _ in range(max_lines):
+        line = f_bin.readline()
+        if not line:
+            return
+        yield line.decode('latin1')
+
+
+def _record_is_plausible(record: List[str], all_columns: List[str], table_name: str) -> bool:
+    """
+    Valida que un registro leído tras un salto aleatorio empiece realmente en un
+    límite de registro: número de campos correcto y columnas numéricas con
+    valores numéricos (un fragmento de CLOB casi nunca cumple ambas cosas).
+    En las tablas de TABLES_MANUAL_CLEANUP se aceptan los registros con campos de
+    más (CLOB desbordado), que la extracción completa trunca en lugar de descartar.
+    """
+    expected_len = len(all_columns)
+    if len(record) == expected_len + 1 and record[-1] == '':
+        record = record[:expected_len]  # Delimitador final sobrante
+    if len(record) > expected_len and table_name in TABLES_MANUAL_CLEANUP:
+        record = record[:expected_len]  # Igual que iter_manual_clean_frames
+    if len(record) != expected_len:
+        return False
+
+    overrides = SCHEMA_OVERRIDES.get(table_name, {})
+    for col_name, value in zip(all_columns, record):
+        dtype = overrides.get(col_name)
+        value = value.strip()
+        if not value or dtype not in (pl.Int64, pl.Float64):
+            continue
+        try:
+            int(value) if dtype == pl.Int64 else float(value)
+        except ValueError:
+            return False
+    return True
+
+
+def _read_record_at(f_bin: io.BufferedReader, offset: int, file_size: int, delimiter: str,
+                    all_columns: List[str], table_name: str) -> Optional[Tuple[int, List[str]]]:
+    """
+    Salta a 'offset', descarta la línea parcial y se resincroniza en el siguiente
+    inicio de registro válido. Devuelve (desplazamiento del registro, registro).
+    """
+    f_bin.seek(offset)
+    f_bin.readline()  # Descartar la línea parcial (o el encabezado)
+
+    for _ in range(SAMPLE_MAX_RESYNC_LINES):
+        record_offset = f_bin.tell()
+        if record_offset >= file_size:
+            return None
+        try:
+            reader = csv.reader(_decoded_lines(f_bin, SAMPLE_MAX_RECORD_LINES), delimiter=delimiter, quotechar='"')
+            record = next(reader)
+        except (StopIteration, csv.Error):
+            record = []
+
+        if _record_is_plausible(record, all_columns, table_name):
+            return record_offset, record[:len(all_columns)]
+
+        # No es inicio de registro: volver y probar desde la siguiente línea
+        f_bin.seek(record_offset)
+        f_bin.readline()
+    return None
+
+
+def _preceding_span(f_bin: io.BufferedReader, record_offset: int, offset: int, data_start: int,
+                    delimiter: str, all_columns: List[str], table_name: str) -> int:
+    """
+    Longitud en bytes de la zona de aterrizaje que lleva al registro: la del
+    registro anterior (o la del encabezado, para el primero). Se busca hacia atrás
+    el inicio de línea desde el que se lee un registro válido que termina justo
+    en 'record_offset'.
+    """
+    if record_offset <= data_start:
+        return data_start
+
+    window = record_offset - offset + SAMPLE_BACKTRACK_BYTES
+    while True:
+        start = max(data_start, record_offset - window)
+        f_bin.seek(start)
+        parts = f_bin.read(record_offset - start).decode('latin1').split('\n')
+        lines = [part + '\n' for part in parts[:-1]]
+        # La primera línea puede estar incompleta, salvo que empiece en data_start
+        first = 0 if start == data_start else 1
+
+        span = 0
+        for i in range(len(lines) - 1, first - 1, -1):
+            span += len(lines[i])  # En latin1, caracteres = bytes
+            if len(lines) - i > SAMPLE_MAX_RECORD_LINES:
+                return span
+            reader = csv.reader(lines[i:], delimiter=delimiter, quotechar='"')
+            try:
+                record = next(reader)
+            except (StopIteration, csv.Error):
+                continue
+            if reader.line_num == len(lines) - i and _record_is_plausible(record, all_columns, table_name):
+                return span
+
+        if start == data_start or window >= MAX_FIELD_SIZE:
+            return max(span, 1)
+        window *= 4
+
+
+def sample_from_file(table_name: str, file_path: SourceFile, delimiter: str, n_rows: int = DEFAULT_SAMPLE_ROWS,
+                     mode: str = 'stratified', seed: Optional[int] = None) -> pl.DataFrame:
+    """
+    Devuelve una muestra de filas de todo el archivo sin leerlo completo.
+
+    Salta a desplazamientos de bytes aleatorios, se resincroniza en el siguiente
+    inicio de registro válido y lee ese registro (que puede ocupar varias líneas si
+    trae CLOBs entre comillas).
+    - 'uniform': desplazamientos uniformes en todo el archivo.
+    - 'stratified': el archivo se divide en N franjas de igual tamaño y se toma un
+      registro de cada una, así la muestra cubre desde los registros más antiguos
+      hasta los más recientes.
+
+    Un salto que cae dentro de un registro selecciona el siguiente, así que cada
+    candidato llega con probabilidad proporcional a la longitud del registro que lo
+    precede. Para compensarlo se acepta con probabilidad inversamente proporcional a
+    esa longitud (muestreo con rechazo), y los rechazos y duplicados se reponen en
+    rondas adicionales. Si tras SAMPLE_MAX_ROUNDS rondas faltan filas, se informa.
+    """
+    if mode not in SAMPLE_MODES:
+        raise ValueError(f"Modo de muestreo inválido '{mode}'. Opciones: {SAMPLE_MODES}")
+
+    print(f"--- MUESTREO '{mode}' de {n_rows} filas para {table_name} ---")
+    rng = random.Random(seed)
+    columns_to_exclude = set(COLUMNS_TO_EXCLUDE.get(table_name, []))
+
+    with file_path.open('rb') as f_bin:
+        header = next(csv.reader([f_bin.readline().decode('latin1')], delimiter=delimiter, quotechar='"'))
+        all_columns = [col for col in (c.strip().strip('"') for c in header) if col]
+        data_start = f_bin.tell()
+        file_size = file_path.stat().st_size
+        if file_size <= data_start:
+            raise ValueError(f"El archivo de '{table_name}' no contiene registros.")
+
+        # Cada fila pedida es una ranura con su rango de saltos. Los saltos cubren
+        # también el encabezado: es la zona de aterrizaje del primer registro.
+        if mode == 'uniform':
+            slots = [(0, file_size)] * n_rows
+        else:
+            stratum = file_size / n_rows
+            slots = [(int(stratum * i), max(int(stratum * (i + 1)), int(stratum * i) + 1)) for i in range(n_rows)]
+
+        filled: Dict[int, List[str]] = {}
+        taken_offsets = set()
+        min_span: Optional[int] = None
+        n_jumps = 0
+
+        for round_number in range(SAMPLE_MAX_ROUNDS):
+            pending = [slot for slot in range(n_rows) if slot not in filled]
+            if not pending:
+                break
+            oversample = min(SAMPLE_OVERSAMPLE * 2 ** round_number, SAMPLE_MAX_OVERSAMPLE)
+
+            # Saltos en orden creciente: la lectura avanza por el archivo y solo
+            # retrocede unos KB para medir el registro anterior
+            jumps = sorted(
+                (rng.randrange(*slots[slot]), slot) for slot in pending for _ in range(oversample)
+            )
+            n_jumps += len(jumps)
+            candidates: Dict[int, List[Tuple[int, List[str], int]]] = {}
+            for offset, slot in jumps:
+                found = _read_record_at(f_bin, offset, file_size, delimiter, all_columns, table_name)
+                if found is None:
+                    continue
+                record_offset, record = found
+                span = _preceding_span(f_bin, record_offset, offset, data_start, delimiter, all_columns, table_name)
+                candidates.setdefault(slot, []).append((record_offset, record, span))
+
+            spans = [span for found in candidates.values() for _, _, span in found]
+            if not spans:
+                continue
+            min_span = min(spans) if min_span is None else min(min_span, min(spans))
+
+            for slot, found in candidates.items():
+                accepted = [
+                    (record_offset, record) for record_offset, record, span in found
+                    if record_offset not in taken_offsets and rng.random() < min_span / span
+                ]
+                if accepted:
+                    record_offset, record = rng.choice(accepted)
+                    filled[slot] = record
+                    taken_offsets.add(record_offset)
+
+    records = [filled[slot] for slot in sorted(filled)]
+    if len(records) < n_rows:
+        print(f"  -> ⚠️ Muestra incompleta: {len(records)} de {n_rows} filas tras {SAMPLE_MAX_ROUNDS} rondas "
+              f"(archivo con pocos registros o difíciles de resincronizar).")
+
+    # Reconstruir un CSV en memoria con las columnas no excluidas y leerlo con Polars
+    # para obtener la misma inferencia de tipos que la extracción completa
+    columns_to_read = [col for col in all_columns if col not in columns_to_exclude]
+    keep_positions = [i for i, col in enumerate(all_columns) if col not in columns_to_exclude]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, quotechar='"', lineterminator='\n')
+    writer.writerow(columns_to_read)
+    for record in records:
+        writer.writerow([record[i] for i in keep_positions])
+
+    df = pl.read_csv(
+        io.StringIO(buffer.getvalue()),
+        separator=delimiter,
+        has_header=True,
+        schema_overrides=SCHEMA_OVERRIDES.get(table_name, {}),
+        infer_schema_length=None,
+        quote_char='\"',
+        ignore_errors=True,
+    )
+    print(f"Muestra extraída: {df.shape[0]} filas de {n_jumps} saltos, {df.shape[1]} columnas.")
+    return df
+
+
 # ==============================================================================
 # FUNCIÓN DE LIMPIEZA MANUAL PARA TABLAS PROBLEMÁTICAS
 # ==============================================================================
 
-def extract_with_manual_clean(table_name: str, file_path: Path, n_rows_limit: Optional[int] = None, all_columns: list = None) -> pl.DataFrame:
-    
-    print(f"--- INICIANDO LIMPIEZA MANUAL Y EXTRACCIÓN para {table_name} ---")
+def _parse_clean_lines(header_line: str, lines: List[str], delimiter: str,
+                       schema_overrides: Dict[str, Any]) -> pl.DataFrame:
+    """Convierte un bloque de líneas ya limpias (sin encabezado) en un DataFrame."""
+    clean_data_str = "\n".join([header_line] + lines)
+    return pl.read_csv(
+        io.StringIO(clean_data_str),
+        separator=delimiter,
+        has_header=True,
+        schema_overrides=schema_overrides,
+        encoding="utf8",
+        rechunk=False,
+        quote_char='\"', 
+        ignore_errors=True 
+    )
+
+
+def iter_manual_clean_frames(table_name: str, file_path: SourceFile, n_rows_limit: Optional[int] = None, all_columns: list = None,
+                             extract_clobs: bool = False, governor: Optional[MemoryGovernor] = None) -> Iterator[pl.DataFrame]:
+    """Limpieza manual por bloques: devuelve un DataFrame por cada bloque de filas limpias."""
     
     clean_lines = []
+    n_frames = 0
+    schema_overrides: Dict[str, Any] = dict(SCHEMA_OVERRIDES.get(table_name, {}))
     anomaly_log = []
     columns_to_exclude = set(COLUMNS_TO_EXCLUDE.get(table_name, []))
+    sidecar: Optional[ClobSidecarWriter] = None
     
     # Ruta de la carpeta 'anomalies' para los logs
     current_dir = Path(__file__).resolve().parent
@@ -118,7 +407,7 @@ def extract_with_manual_clean(table_name: str, file_path: Path, n_rows_limit: Op
 
     try:
         # --- LECTURA BINARIA ROBUSTA PARA EVITAR ERRORES DE ENCODING ---
-        with open(file_path, 'rb') as f_bin:
+        with file_path.open('rb') as f_bin:
             f = io.TextIOWrapper(f_bin, encoding='latin1', newline='') 
             
             reader = csv.reader(f, delimiter=delimiter, quotechar='"')
@@ -135,7 +424,22 @@ def extract_with_manual_clean(table_name: str, file_path: Path, n_rows_limit: Op
                     pass 
 
             columns_to_read = [col for col in all_columns if col not in columns_to_exclude]
-            clean_lines.append(delimiter.join(columns_to_read)) 
+            header_line = delimiter.join(columns_to_read)
+            batch_rows = governor.chunk_rows(MANUAL_BATCH_ROWS) if governor else MANUAL_BATCH_ROWS
+
+            # Sidecar opcional: los CLOBs excluidos se guardan aparte, indexados por la llave primaria.
+            # Una lectura limitada (vista previa) no reemplaza el sidecar completo.
+            if extract_clobs and n_rows_limit is not None:
+                print(f"  -> Sidecar CLOB omitido: lectura limitada a {n_rows_limit} filas.")
+            elif extract_clobs and columns_to_exclude and table_name in TABLE_PRIMARY_KEYS:
+                clob_columns = [col for col in all_columns if col in columns_to_exclude]
+                clob_positions = [all_columns.index(col) for col in clob_columns]
+                key_column = TABLE_PRIMARY_KEYS[table_name]
+                key_position = all_columns.index(key_column)
+                sidecar = ClobSidecarWriter(
+                    table_name, clob_columns,
+                    key_dtype=SCHEMA_OVERRIDES.get(table_name, {}).get(key_column, pl.Utf8),
+                )
 
             # 2. Iterar sobre las filas y aplicar limpieza
             for i, row in enumerate(reader):
@@ -170,14 +474,42 @@ def extract_with_manual_clean(table_name: str, file_path: Path, n_rows_limit: Op
                     continue
 
                 clean_lines.append(delimiter.join(final_row))
+
+                # Convertir el bloque acumulado a Polars. El esquema inferido en el
+                # primer bloque se fija para los siguientes (igual que una lectura única).
+                if len(clean_lines) >= batch_rows:
+                    frame = _parse_clean_lines(header_line, clean_lines, delimiter, schema_overrides)
+                    if n_frames == 0:
+                        schema_overrides = dict(frame.schema)
+                    n_frames += 1
+                    clean_lines = []
+                    yield frame
+                    if governor:
+                        batch_rows = governor.chunk_rows(MANUAL_BATCH_ROWS)
+
+                # El sidecar conserva el texto original (sin la limpieza de caracteres)
+                if sidecar is not None:
+                    sidecar.add_row(row, key_position, clob_positions, expected_len, delimiter)
                 
                 if isinstance(n_rows_limit, int) and i >= n_rows_limit: 
                     break
+
+            # Convertir el último bloque antes de confirmar el sidecar
+            last_frame = None
+            if clean_lines or n_frames == 0:
+                last_frame = _parse_clean_lines(header_line, clean_lines, delimiter, schema_overrides)
+            if sidecar is not None:
+                sidecar.close()
                 
     except Exception as e:
         print(f"Error fatal durante la lectura manual: {e}")
         sample_problematic_lines(file_path)
         raise
+    finally:
+        # Lectura fallida o interrumpida (p. ej. cancelación del modo segmentado):
+        # se conserva el sidecar anterior en lugar de dejar uno truncado
+        if sidecar is not None:
+            sidecar.abort()
         
     # 4. Registrar anomalías
     if anomaly_log:
@@ -189,19 +521,21 @@ def extract_with_manual_clean(table_name: str, file_path: Path, n_rows_limit: Op
                 f.write(f"{log}\n")
         print(f"  {len(anomaly_log)} Anomalías registradas y saltadas/truncadas en: {log_file.name}")
 
-    # 5. Cargar el texto limpio en Polars
-    clean_data_str = "\n".join(clean_lines)
+    # 5. Entregar el último bloque de texto limpio
+    if last_frame is not None:
+        yield last_frame
+
+
+def extract_with_manual_clean(table_name: str, file_path: SourceFile, n_rows_limit: Optional[int] = None, all_columns: list = None,
+                              extract_clobs: bool = False, governor: Optional[MemoryGovernor] = None) -> pl.DataFrame:
     
-    df = pl.read_csv(
-        io.StringIO(clean_data_str),
-        separator=delimiter,
-        has_header=True,
-        schema_overrides=SCHEMA_OVERRIDES.get(table_name, {}),
-        encoding="utf8",
-        rechunk=True,
-        quote_char='\"', 
-        ignore_errors=True 
-    )
+    print(f"--- INICIANDO LIMPIEZA MANUAL Y EXTRACCIÓN para {table_name} ---")
+
+    frames = list(iter_manual_clean_frames(table_name, file_path, n_rows_limit, all_columns, extract_clobs, governor))
+
+    # Sin gobernador se compacta en memoria contigua como antes; con gobernador
+    # se evita la copia adicional que implica el rechunk.
+    df = pl.concat(frames, how="vertical", rechunk=governor is None)
     
     print(f"Datos extraídos: {df.shape[0]} filas, {df.shape[1]} columnas.")
     return df
@@ -211,8 +545,46 @@ def extract_with_manual_clean(table_name: str, file_path: Path, n_rows_limit: Op
 # FUNCIÓN PRINCIPAL DE EXTRACCIÓN
 # ==============================================================================
 
-def extract_from_file(table_name: str, root_path: Path, limit: Optional[int] = None) -> pl.DataFrame:
-    """Función principal para dirigir la extracción robusta."""
+def _resolve_delimiter(table_name: str, file_path: SourceFile) -> str:
+    # === LÓGICA DE CORRECCIÓN DELIMITADOR ===
+    delimiter = ',' if file_path.suffix == '.csv' else '|'
+    
+    if table_name == 'MVCARATULAS':
+        delimiter = '|' 
+    # =======================================
+    return delimiter
+
+
+def _read_manual_header(file_path: SourceFile, delimiter: str) -> List[str]:
+    """Lee el encabezado manualmente (tablas de TABLES_REQUIRING_MANUAL_HEADER)."""
+    try:
+        with file_path.open('rb') as f_bin:
+             f = io.TextIOWrapper(f_bin, encoding='latin1', newline='')
+             header_line = f.readline().strip()
+        
+        raw_columns = [col.strip().strip('"') for col in header_line.split(delimiter)]
+        all_columns = [col for col in raw_columns if col]
+        
+        if not all_columns or len(all_columns) < 2:
+            raise ValueError("Encabezado inválido o no encontrado.")
+
+    except Exception as e:
+        sample_problematic_lines(file_path)
+        raise ValueError(f"Error al leer encabezado manualmente: {e}")
+    return all_columns
+
+
+def extract_from_file(table_name: str, root_path: Path, limit: Optional[int] = None,
+                      extract_clobs: bool = False, governor: Optional[MemoryGovernor] = None,
+                      sample: Optional[str] = None, seed: Optional[int] = None) -> pl.DataFrame:
+    """
+    Función principal para dirigir la extracción robusta.
+    Con 'extract_clobs=True' las columnas de COLUMNS_TO_EXCLUDE se guardan en el
+    sidecar de CLOBs (ver clob_store.py) en lugar de descartarse.
+    Con 'governor' el tamaño de los bloques se ajusta al RSS del proceso.
+    Con 'sample' ('uniform' o 'stratified') se devuelve una muestra aleatoria de
+    'limit' filas de todo el archivo en lugar de las primeras 'limit' filas.
+    """
     print(f"--- INICIANDO EXTRACCIÓN (E) para {table_name} ---")
     
     file_path = get_file_paths(table_name, root_path) 
@@ -226,28 +598,13 @@ def extract_from_file(table_name: str, root_path: Path, limit: Optional[int] = N
     columns_to_exclude = set(COLUMNS_TO_EXCLUDE.get(table_name, []))
     all_columns: List[str] = []
     
-    # === LÓGICA DE CORRECCIÓN DELIMITADOR ===
-    delimiter = ',' if file_path.suffix == '.csv' else '|'
-    
-    if table_name == 'MVCARATULAS':
-        delimiter = '|' 
-    # =======================================
+    delimiter = _resolve_delimiter(table_name, file_path)
+
+    if sample:
+        return sample_from_file(table_name, file_path, delimiter, limit or DEFAULT_SAMPLE_ROWS, sample, seed)
     
     if table_name in TABLES_REQUIRING_MANUAL_HEADER:
-        try:
-            with open(file_path, 'rb') as f_bin:
-                 f = io.TextIOWrapper(f_bin, encoding='latin1', newline='')
-                 header_line = f.readline().strip()
-            
-            raw_columns = [col.strip().strip('"') for col in header_line.split(delimiter)]
-            all_columns = [col for col in raw_columns if col]
-            
-            if not all_columns or len(all_columns) < 2:
-                raise ValueError("Encabezado inválido o no encontrado.")
-
-        except Exception as e:
-            sample_problematic_lines(file_path)
-            raise ValueError(f"Error al leer encabezado manualmente: {e}")
+        all_columns = _read_manual_header(file_path, delimiter)
         
         columns_to_read = [col for col in all_columns if col not in columns_to_exclude]
         
@@ -256,11 +613,23 @@ def extract_from_file(table_name: str, root_path: Path, limit: Optional[int] = N
 
     # --- 2. Desvío para Limpieza Manual
     if table_name in TABLES_MANUAL_CLEANUP:
-        return extract_with_manual_clean(table_name, file_path, limit, all_columns) 
+        return extract_with_manual_clean(table_name, file_path, limit, all_columns, extract_clobs, governor) 
     
     # --- 3. Lectura Estándar de Polars para el resto de tablas ---
     
     print(f"Extrayendo datos de: {file_path.as_posix()}")
+
+    if table_name in TABLES_REQUIRING_MANUAL_HEADER and USE_HYBRID_READER:
+        try:
+            df = read_hybrid(table_name, file_path, delimiter, all_columns,
+                             SCHEMA_OVERRIDES.get(table_name, {}), limit, governor)
+        except Exception as e:
+            sample_problematic_lines(file_path)
+            raise e
+
+        df = df.drop([col for col in columns_to_exclude if col in df.columns])
+        print(f"Datos extraídos: {df.shape[0]} filas, {df.shape[1]} columnas.")
+        return df
     
     read_params: Dict[str, Any] = {
         'separator': delimiter, 
@@ -286,11 +655,113 @@ def extract_from_file(table_name: str, root_path: Path, limit: Optional[int] = N
         })
     
     try:
-        df = pl.read_csv(file_path.as_posix(), **read_params)
+        if isinstance(file_path, Path) and governor is None:
+            df = pl.read_csv(file_path.as_posix(), **read_params)
+        else:
+            # Un miembro del tar no tiene ruta en disco, y con gobernador el tamaño de
+            # cada rango se ajusta al RSS: se lee como flujo por rangos y los bloques
+            # se concatenan
+            frames = list(_iter_standard_frames(
+                table_name, file_path, delimiter, governor, limit,
+                new_columns=columns_to_read if table_name in TABLES_REQUIRING_MANUAL_HEADER else None,
+            ))
+            df = pl.concat(frames, how="vertical", rechunk=governor is None)
     except Exception as e:
         sample_problematic_lines(file_path)
         raise e
 
     print(f"Datos extraídos: {df.shape[0]} filas, {df.shape[1]} columnas.")
     return df
+
+
+# ==============================================================================
+# EXTRACCIÓN POR BLOQUES (MODO SEGMENTADO)
+# ==============================================================================
+
+def _iter_standard_frames(table_name: str, file_path: SourceFile, delimiter: str,
+                          governor: Optional[MemoryGovernor] = None, n_rows: Optional[int] = None,
+                          new_columns: Optional[List[str]] = None) -> Iterator[pl.DataFrame]:
+    """
+    Lectura estándar de Polars por rangos de bytes alineados a fin de línea. El
+    esquema inferido en el primer rango se fija para los siguientes.
+    Con 'new_columns' se omite el encabezado del archivo y se usan esos nombres
+    (misma lectura que las tablas de TABLES_REQUIRING_MANUAL_HEADER).
+    """
+    schema_overrides: Dict[str, Any] = dict(SCHEMA_OVERRIDES.get(table_name, {}))
+    first = True
+    total_rows = 0
+
+    with file_path.open('rb') as f_bin:
+        header_line = f_bin.readline().decode('latin1')
+        for _, block in iter_byte_ranges(f_bin, HYBRID_RANGE_BYTES, delimiter, governor):
+            if new_columns:
+                text, header_params = block.decode('latin1'), {
+                    'has_header': False, 'new_columns': new_columns, 'ignore_errors': True,
+                }
+            else:
+                text, header_params = header_line + block.decode('latin1'), {
+                    'has_header': True, 'ignore_errors': False,
+                }
+            df = pl.read_csv(
+                text.encode('utf8'),
+                separator=delimiter,
+                infer_schema_length=100000,
+                schema_overrides=schema_overrides,
+                quote_char='\"',
+                n_rows=None if n_rows is None else n_rows - total_rows,
+                **header_params,
+            )
+            if first:
+                schema_overrides = dict(df.schema)
+                first = False
+            total_rows += df.shape[0]
+            yield df
+            if n_rows is not None and total_rows >= n_rows:
+                break
+
+    # Archivo sin registros: un DataFrame vacío con las columnas del encabezado
+    if first:
+        columns = new_columns or [col.strip().strip('"') for col in header_line.rstrip('\r\n').split(delimiter)]
+        yield pl.DataFrame(schema={col: schema_overrides.get(col, pl.Utf8) for col in columns})
+
+
+def iter_extract_chunks(table_name: str, root_path: Path, extract_clobs: bool = False,
+                        governor: Optional[MemoryGovernor] = None) -> Iterator[pl.DataFrame]:
+    """
+    Igual que extract_from_file, pero devuelve la tabla por bloques a medida que se
+    leen, para que las etapas siguientes trabajen mientras continúa la lectura.
+    """
+    print(f"--- INICIANDO EXTRACCIÓN POR BLOQUES (E) para {table_name} ---")
+
+    file_path = get_file_paths(table_name, root_path)
+    if not file_path:
+        raise FileNotFoundError(f"No se encontró el archivo para '{table_name}'.")
+    print(f"  -> Archivo encontrado: {file_path.name}")
+
+    delimiter = _resolve_delimiter(table_name, file_path)
+    columns_to_exclude = set(COLUMNS_TO_EXCLUDE.get(table_name, []))
+    all_columns: List[str] = []
+    if table_name in TABLES_REQUIRING_MANUAL_HEADER:
+        all_columns = _read_manual_header(file_path, delimiter)
+
+    if table_name in TABLES_MANUAL_CLEANUP:
+        chunks = iter_manual_clean_frames(table_name, file_path, None, all_columns, extract_clobs, governor)
+    elif table_name in TABLES_REQUIRING_MANUAL_HEADER:
+        chunks = iter_hybrid_frames(table_name, file_path, delimiter, all_columns,
+                                    SCHEMA_OVERRIDES.get(table_name, {}), governor=governor)
+    else:
+        chunks = _iter_standard_frames(table_name, file_path, delimiter, governor)
+
+    total_rows = 0
+    try:
+        for chunk in chunks:
+            chunk = chunk.drop([col for col in columns_to_exclude if col in chunk.columns])
+            total_rows += chunk.shape[0]
+            yield chunk
+    except Exception:
+        sample_problematic_lines(file_path)
+        raise
+
+    print(f"Datos extraídos: {total_rows} filas.")
+
 # --- FIN DEL ARCHIVO src/extractor.py
\ No newline at end of file
@@ -0,0 +1,360 @@
+# --- INICIO DEL ARCHIVO src/hybrid_reader.py ---
+import csv
+import io
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import polars as pl
+
+from memory_governor import MemoryGovernor
+from tar_source import SourceFile
+
+# ==============================================================================
+# CONFIGURACIÓN DEL LECTOR HÍBRIDO
+# ==============================================================================
+# El archivo se procesa por rangos de bytes alineados a fin de línea. Dentro de
+# cada rango, las líneas con el número de campos correcto y sin comillas se leen
+# con el lector nativo de Polars; solo las líneas restantes se re-procesan con el
+# módulo csv de Python (tolerante a comillas y saltos de línea en los valores).
+# Lo que no se puede leer, o cuyos valores no son del tipo esperado, va a cuarentena
+# en lugar de convertirse en nulo en silencio (como hacía ignore_errors=True).
+HYBRID_RANGE_BYTES = 64 * 1024 * 1024
+
+# Bytes adicionales que se leen, como máximo, para cerrar comillas abiertas al final de un rango
+MAX_QUOTE_CARRY_BYTES = 16 * 1024 * 1024
+
+INFER_SCHEMA_ROWS = 100_000
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ANOMALIES_DIR = BASE_DIR / 'anomalies'
+
+_ROW_COL = '__fila'
+_RAW_COL = '__registro'
+_OFFSET_COL = '__byte'
+
+
+def _line_ends_in_quotes(line: str, delimiter: str, in_quotes: bool) -> bool:
+    """
+    Indica si la línea termina dentro de un valor entre comillas, con las reglas del
+    módulo csv: una comilla solo abre un valor al inicio de un campo; en otra
+    posición es texto literal (p. ej. O"BRIEN). Dentro de comillas, '""' es una
+    comilla escapada y cualquier otra comilla cierra el valor.
+    """
+    field_start = -1 if in_quotes else 0
+    skip_next = False
+    for match in re.finditer(f'"|{re.escape(delimiter)}', line):
+        pos = match.start()
+        if skip_next:
+            skip_next = False
+        elif in_quotes:
+            if match.group() == '"':
+                if line.startswith('"', pos + 1):
+                    skip_next = True
+                else:
+                    in_quotes = False
+        elif match.group() == delimiter:
+            field_start = pos + 1
+        elif pos == field_start:
+            in_quotes = True
+    return in_quotes
+
+
+def _text_ends_in_quotes(text: str, delimiter: str) -> bool:
+    """Estado de comillas al final del texto. Solo se revisan las líneas con comillas."""
+    in_quotes = False
+    pos = text.find('"')
+    while pos != -1:
+        line_start = text.rfind('\n', 0, pos) + 1
+        line_end = text.find('\n', pos)
+        if line_end == -1:
+            line_end = len(text)
+        in_quotes = _line_ends_in_quotes(text[line_start:line_end].rstrip('\r'), delimiter, in_quotes)
+        pos = text.find('"', line_end)
+    return in_quotes
+
+
+def iter_byte_ranges(f_bin: io.BufferedReader, range_bytes: int, delimiter: str,
+                     governor: Optional[MemoryGovernor] = None) -> Iterator[Tuple[int, bytes]]:
+    """
+    Devuelve (desplazamiento, bloque) alineados a fin de línea. Si un bloque termina
+    dentro de un valor entre comillas, se extiende hasta cerrarlo para no partir un registro.
+    Con 'governor', el tamaño de cada rango se recalcula según el RSS antes de leerlo.
+    """
+    while True:
+        offset = f_bin.tell()
+        block = f_bin.read(governor.chunk_bytes(range_bytes) if governor else range_bytes)
+        if not block:
+            return
+        block += f_bin.readline()
+
+        in_quotes = b'"' in block and _text_ends_in_quotes(block.decode('latin1'), delimiter)
+        carried = 0
+        while in_quotes and carried < MAX_QUOTE_CARRY_BYTES:
+            line = f_bin.readline()
+            if not line:
+                break
+            block += line
+            carried += len(line)
+            if b'"' in line:
+                in_quotes = _line_ends_in_quotes(line.decode('latin1').rstrip('\r\n'), delimiter, True)
+        yield offset, block
+
+
+# ==============================================================================
+# CONVERSIÓN DE TIPOS CON DETECCIÓN DE VALORES INVÁLIDOS
+# ==============================================================================
+
+def _cast_column(col: pl.Series, dtype: Any) -> pl.Series:
+    if dtype == pl.String:
+        return col
+    if dtype == pl.Boolean:
+        return col.str.to_lowercase().replace_strict({'true': True, 'false': False}, default=None, return_dtype=pl.Boolean)
+    return col.str.strip_chars().cast(dtype, strict=False)
+
+
+def _cast_with_quarantine(df_str: pl.DataFrame, schema: Dict[str, Any]) -> Tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Convierte un DataFrame de texto al esquema. Devuelve (filas válidas, filas en
+    cuarentena): una fila va a cuarentena si algún valor no nulo no pudo convertirse.
+    """
+    casted = {}
+    failed_columns = []
+    for name, dtype in schema.items():
+        original = df_str[name]
+        converted = _cast_column(original, dtype)
+        casted[name] = converted
+        if dtype != pl.String:
+            failed_columns.append(
+                pl.when(converted.is_null() & original.is_not_null()).then(pl.lit(name)).otherwise(None)
+            )
+
+    typed = df_str.with_columns([s.alias(n) for n, s in casted.items()])
+    if not failed_columns:
+        return typed.drop(_RAW_COL), typed.clear().select(_ROW_COL, _OFFSET_COL, _RAW_COL).with_columns(Motivo=pl.lit(''))
+
+    typed = typed.with_columns(pl.concat_str(failed_columns, separator=', ', ignore_nulls=True).alias('__fallas'))
+    bad = typed.filter(pl.col('__fallas') != '')
+    good = typed.filter(pl.col('__fallas') == '').drop('__fallas', _RAW_COL)
+    quarantined = bad.select(
+        _ROW_COL, _OFFSET_COL, _RAW_COL,
+        Motivo=pl.lit('Tipo inválido en: ') + pl.col('__fallas'),
+    )
+    return good, quarantined
+
+
+# ==============================================================================
+# LECTURA DE UN RANGO
+# ==============================================================================
+
+def _split_lines(block: bytes) -> pl.DataFrame:
+    """Líneas del bloque con su número relativo y su desplazamiento en bytes dentro del bloque."""
+    lines = pl.Series('linea', block.decode('latin1').split('\n'), dtype=pl.String)
+    # En latin1 cada carácter ocupa un byte: la longitud en caracteres es la longitud en bytes
+    return pl.DataFrame(lines).with_row_index(_ROW_COL).with_columns(
+        pl.col(_ROW_COL).cast(pl.Int64),
+        (pl.col('linea').str.len_chars() + 1).cum_sum().shift(1, fill_value=0).cast(pl.Int64).alias(_OFFSET_COL),
+        pl.col('linea').str.strip_suffix('\r'),
+    )
+
+
+def _classify_lines(lines_df: pl.DataFrame, delimiter: str, expected_len: int) -> pl.DataFrame:
+    """
+    Marca como 'nativa' cada línea sin comillas, fuera de un valor entre comillas y
+    con exactamente 'expected_len' campos (se admite un delimitador final sobrante).
+    Las líneas vacías se descartan solo fuera de comillas: dentro de un valor son
+    parte del texto y el respaldo en Python las necesita para reconstruirlo.
+    """
+    sep = re.escape(delimiter)
+    n_delims = pl.col('linea').str.count_matches(sep)
+    has_quotes = pl.col('linea').str.contains('"', literal=True)
+    trailing = (n_delims == expected_len) & pl.col('linea').str.ends_with(delimiter)
+
+    # Solo las líneas con comillas cambian el estado; se recorren en orden y el
+    # estado se propaga a las demás líneas
+    quoted_idx = lines_df.select(pl.arg_where(has_quotes)).to_series()
+    ends, in_quotes = [], False
+    for line in lines_df['linea'].gather(quoted_idx).to_list():
+        in_quotes = _line_ends_in_quotes(line, delimiter, in_quotes)
+        ends.append(in_quotes)
+    ends_in_quotes = pl.Series([None] * lines_df.shape[0], dtype=pl.Boolean).scatter(quoted_idx, ends)
+    inside_quotes = ends_in_quotes.fill_null(strategy="forward").shift(1).fill_null(False)
+
+    return lines_df.with_columns(
+        inside_quotes.alias('__dentro'),
+    ).filter((pl.col('linea') != '') | pl.col('__dentro')).with_columns(
+        nativa=((n_delims == expected_len - 1) | trailing) & ~has_quotes & ~pl.col('__dentro'),
+    ).with_columns(
+        # Quitar el delimitador final sobrante para que todas las líneas nativas tengan los mismos campos
+        pl.when(pl.col('nativa') & trailing).then(pl.col('linea').str.slice(0, pl.col('linea').str.len_chars() - 1))
+        .otherwise(pl.col('linea')).alias('linea'),
+    ).drop('__dentro')
+
+
+def _parse_native(native: pl.DataFrame, columns: List[str], delimiter: str) -> pl.DataFrame:
+    """Lectura nativa (todo como texto) de las líneas válidas."""
+    text = native['linea'].str.join('\n').item()
+    df_str = pl.read_csv(
+        text.encode('utf8'),
+        has_header=False,
+        separator=delimiter,
+        schema={c: pl.String for c in columns},
+        quote_char=None,
+    )
+    return df_str.with_columns(native[_ROW_COL], native[_OFFSET_COL], native['linea'].alias(_RAW_COL))
+
+
+def _parse_fallback(fallback: pl.DataFrame, columns: List[str], delimiter: str) -> Tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Re-procesa con el módulo csv de Python las líneas que el lector nativo no puede
+    leer. Las líneas contiguas se procesan juntas para reconstruir registros con
+    saltos de línea dentro de comillas (incluidas las líneas vacías dentro del valor).
+    """
+    expected_len = len(columns)
+    rows: Dict[str, List[Optional[str]]] = {c: [] for c in columns + [_RAW_COL]}
+    row_ids: List[int] = []
+    offsets: List[int] = []
+    quarantine: List[Dict[str, Any]] = []
+
+    # Agrupar en tramos de líneas contiguas
+    ids = fallback[_ROW_COL].to_list()
+    texts = fallback['linea'].to_list()
+    byte_offsets = fallback[_OFFSET_COL].to_list()
+    start = 0
+    for end in range(1, len(ids) + 1):
+        if end < len(ids) and ids[end] == ids[end - 1] + 1:
+            continue
+
+        run_lines = texts[start:end]
+        reader = csv.reader(io.StringIO('\n'.join(run_lines)), delimiter=delimiter, quotechar='"')
+        line_pos = 0
+        for record in reader:
+            row_id, offset = ids[start + line_pos], byte_offsets[start + line_pos]
+            raw = '\n'.join(run_lines[line_pos:reader.line_num])
+            line_pos = reader.line_num
+
+            if len(record) == expected_len + 1 and record[-1] == '':
+                record = record[:expected_len]
+            if len(record) != expected_len:
+                quarantine.append({
+                    _ROW_COL: row_id, _OFFSET_COL: offset, _RAW_COL: raw,
+                    'Motivo': f"Longitud: esperado {expected_len}, obtenido {len(record)}",
+                })
+                continue
+
+            for col, value in zip(columns, record):
+                value = value.replace('\n', ' ').replace('\r', ' ')
+                rows[col].append(value if value != '' else None)
+            rows[_RAW_COL].append(raw)
+            row_ids.append(row_id)
+            offsets.append(offset)
+        start = end
+
+    df_str = pl.DataFrame(rows, schema={c: pl.String for c in rows}).with_columns(
+        pl.Series(_ROW_COL, row_ids, dtype=pl.Int64),
+        pl.Series(_OFFSET_COL, offsets, dtype=pl.Int64),
+    ).select(columns + [_ROW_COL, _OFFSET_COL, _RAW_COL])
+    quarantined = pl.DataFrame(
+        quarantine,
+        schema={_ROW_COL: pl.Int64, _OFFSET_COL: pl.Int64, _RAW_COL: pl.String, 'Motivo': pl.String},
+    )
+    return df_str, quarantined
+
+
+# ==============================================================================
+# LECTOR HÍBRIDO
+# ==============================================================================
+
+def iter_hybrid_frames(table_name: str, file_path: SourceFile, delimiter: str, columns: List[str],
+                       schema_overrides: Dict[str, Any], n_rows: Optional[int] = None,
+                       governor: Optional[MemoryGovernor] = None,
+                       anomalies_dir: Path = ANOMALIES_DIR) -> Iterator[pl.DataFrame]:
+    """
+    Lee el archivo (omitiendo el encabezado) por rangos y devuelve un DataFrame por
+    rango. El esquema se infiere en el primer rango y se fija para los siguientes.
+    Al terminar, las filas en cuarentena se guardan en 'anomalies_dir'. Un archivo
+    sin registros produce un DataFrame vacío con el esquema de 'schema_overrides'.
+    """
+    schema: Optional[Dict[str, Any]] = None
+    quarantine_frames: List[pl.DataFrame] = []
+    total_rows = 0
+    n_frames = 0
+    lines_before = 1  # Encabezado
+    native_ranges = fallback_ranges = 0
+
+    with file_path.open('rb') as f_bin:
+        f_bin.readline()
+        for base_offset, block in iter_byte_ranges(f_bin, HYBRID_RANGE_BYTES, delimiter, governor):
+            lines_df = _split_lines(block)
+            n_lines = lines_df.shape[0] - (1 if block.endswith(b'\n') else 0)
+            lines_df = _classify_lines(lines_df, delimiter, len(columns)).with_columns(
+                (pl.col(_ROW_COL) + lines_before + 1).alias(_ROW_COL),
+                (pl.col(_OFFSET_COL) + base_offset).alias(_OFFSET_COL),
+            )
+            lines_before += n_lines
+
+            native = lines_df.filter(pl.col('nativa'))
+            fallback = lines_df.filter(~pl.col('nativa'))
+
+            if schema is None:
+                sample = native.head(INFER_SCHEMA_ROWS)['linea'].str.join('\n').item()
+                schema = dict(pl.read_csv(
+                    sample.encode('utf8'), has_header=False, separator=delimiter, new_columns=columns,
+                    schema_overrides=schema_overrides, infer_schema_length=INFER_SCHEMA_ROWS,
+                    quote_char=None, ignore_errors=True,
+                ).schema) if sample else {c: schema_overrides.get(c, pl.String) for c in columns}
+
+            parts = [_parse_native(native, columns, delimiter)] if native.shape[0] else []
+            if fallback.shape[0]:
+                fallback_ranges += 1
+                df_fallback, bad_rows = _parse_fallback(fallback, columns, delimiter)
+                parts.append(df_fallback)
+                quarantine_frames.append(bad_rows)
+            else:
+                native_ranges += 1
+
+            if parts:
+                df_str = pl.concat(parts, how='vertical').sort(_ROW_COL)
+                df, bad_rows = _cast_with_quarantine(df_str, schema)
+                quarantine_frames.append(bad_rows)
+                df = df.drop(_ROW_COL, _OFFSET_COL)
+
+                if n_rows is not None:
+                    df = df.head(n_rows - total_rows)
+                total_rows += df.shape[0]
+                n_frames += 1
+                yield df
+
+            if n_rows is not None and total_rows >= n_rows:
+                break
+
+    # Archivo sin registros: un DataFrame vacío con el esquema esperado
+    if n_frames == 0:
+        yield pl.DataFrame(schema=schema or {c: schema_overrides.get(c, pl.String) for c in columns})
+
+    print(f"  -> Lector híbrido: {native_ranges} rangos nativos, {fallback_ranges} rangos con respaldo en Python.")
+    _write_quarantine(table_name, quarantine_frames, anomalies_dir)
+
+
+def _write_quarantine(table_name: str, frames: List[pl.DataFrame], anomalies_dir: Path) -> None:
+    frames = [f for f in frames if f.shape[0]]
+    if not frames:
+        return
+    quarantine = pl.concat(frames, how='vertical').sort(_ROW_COL).select(
+        pl.col(_ROW_COL).alias('Linea'), pl.col(_OFFSET_COL).alias('Byte_Offset'),
+        'Motivo', pl.col(_RAW_COL).alias('Registro'),
+    )
+    anomalies_dir.mkdir(exist_ok=True)
+    log_file = anomalies_dir / f"{table_name}_quarantine_{datetime.now():%Y%m%d_%H%M%S}.csv"
+    quarantine.write_csv(log_file.as_posix())
+    print(f"  {quarantine.shape[0]} filas en cuarentena registradas en: {log_file.name}")
+
+
+def read_hybrid(table_name: str, file_path: SourceFile, delimiter: str, columns: List[str],
+                schema_overrides: Dict[str, Any], n_rows: Optional[int] = None,
+                governor: Optional[MemoryGovernor] = None) -> pl.DataFrame:
+    """Lectura completa con el lector híbrido (ver iter_hybrid_frames)."""
+    frames = list(iter_hybrid_frames(table_name, file_path, delimiter, columns, schema_overrides, n_rows, governor))
+    return pl.concat(frames, how='vertical', rechunk=governor is None)
+
+# --- FIN DEL ARCHIVO src/hybrid_reader.py ---
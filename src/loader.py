@@ -5,6 +5,8 @@ import pyodbc
 from typing import Optional, List, Dict
 import configparser 
 
+from memory_governor import MemoryGovernor
+
 # ==============================================================================
 # CONFIGURACIÓN DE RUTAS
 # ==============================================================================
@@ -13,6 +15,9 @@ CLEAN_DATA_PATH = Path("../data/clean_data")
 CONFIG_FILE = Path(__file__).parent.parent / 'config' / 'database.ini'
 SECTION = 'sql_server_siger' # Sección definida por el usuario
 
+# Filas por lote de executemany (el gobernador de memoria lo reduce si hace falta)
+SQL_BATCH_ROWS = 50_000
+
 # ==============================================================================
 # FUNCIONES DE CONEXIÓN Y CARGA
 # ==============================================================================
@@ -56,25 +61,44 @@ def get_db_connection() -> Optional[pyodbc.Connection]:
         print(f"  -> ❌ ERROR de conexión a SQL Server. SQLSTATE: {sqlstate}")
         return None
 
-def load_to_sql_server(df: pl.DataFrame, table_name: str, conn: pyodbc.Connection):
-    """Carga los datos del DataFrame en la tabla de SQL Server (L2) usando pyodbc."""
+def insert_rows(cursor: pyodbc.Cursor, df: pl.DataFrame, table_name: str,
+                governor: Optional[MemoryGovernor] = None) -> int:
+    """Inserta el DataFrame por lotes de executemany, sin confirmar la transacción."""
+    placeholders: str = ', '.join(['?' for _ in df.columns])
+    sql_insert: str = f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})"
+    
+    total_rows = df.shape[0]
+    offset = 0
+    while offset < total_rows:
+        batch_rows = governor.chunk_rows(SQL_BATCH_ROWS) if governor else SQL_BATCH_ROWS
+        data: List[tuple] = df.slice(offset, batch_rows).rows()
+        cursor.executemany(sql_insert, data)
+        offset += len(data)
+    return total_rows
+
+
+def load_to_sql_server(df: pl.DataFrame, table_name: str, conn: pyodbc.Connection,
+                       governor: Optional[MemoryGovernor] = None) -> bool:
+    """
+    Carga los datos del DataFrame en la tabla de SQL Server (L2) usando pyodbc.
+    Las filas se materializan como tuplas por lotes (nunca la tabla completa);
+    la transacción se confirma una sola vez al final.
+    """
     
     cursor = conn.cursor()
     print(f"  -> Preparando inserción masiva en la tabla '{table_name}'...")
     
     try:
-        placeholders: str = ', '.join(['?' for _ in df.columns])
-        sql_insert: str = f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})"
-        
-        data: List[tuple] = [tuple(row.values()) for row in df.to_dicts()]
-        cursor.executemany(sql_insert, data)
+        total_rows = insert_rows(cursor, df, table_name, governor)
         conn.commit()
         
-        print(f"  -> ✅ Carga L2 a SQL Server exitosa: {len(data)} filas insertadas en {table_name}.")
+        print(f"  -> ✅ Carga L2 a SQL Server exitosa: {total_rows} filas insertadas en {table_name}.")
+        return True
 
     except Exception as e:
         conn.rollback()
         print(f"  -> ❌ FALLO en la inserción masiva a {table_name}. ERROR SQL Server/ODBC: {str(e)}")
+        return False
     finally:
         cursor.close()
 
@@ -82,7 +106,7 @@ def load_to_sql_server(df: pl.DataFrame, table_name: str, conn: pyodbc.Connectio
 # FUNCIONES DE CARGA
 # ==============================================================================
 
-def load_to_parquet(df: pl.DataFrame, table_name: str, output_path: Path):
+def load_to_parquet(df: pl.DataFrame, table_name: str, output_path: Path) -> bool:
     """Carga el DataFrame limpio en un archivo Parquet (L1)."""
     output_path.mkdir(parents=True, exist_ok=True)
     file_path = output_path / f"{table_name}.parquet"
@@ -91,23 +115,30 @@ def load_to_parquet(df: pl.DataFrame, table_name: str, output_path: Path):
     try:
         df.write_parquet(file=file_path.as_posix(), compression="zstd")
         print(f"  -> ✅ Carga L1 exitosa: {df.shape[0]} filas cargadas en Parquet.")
+        return True
     except Exception as e:
         print(f"  -> ❌ ERROR durante la carga L1 a Parquet: {str(e)}")
+        return False
 
 
-def apply_loading(table_name: str, df: pl.DataFrame) -> None:
-    """Función principal que dirige el proceso de carga L1 (Parquet) y L2 (SQL Server)."""
+def apply_loading(table_name: str, df: pl.DataFrame, governor: Optional[MemoryGovernor] = None) -> bool:
+    """
+    Función principal que dirige el proceso de carga L1 (Parquet) y L2 (SQL Server).
+    Devuelve True solo si ambas cargas terminaron correctamente.
+    """
     print(f"--- INICIANDO CARGA (L) para {table_name} ---")
     
     # L1: Cargar a Parquet (Staging local)
-    load_to_parquet(df, table_name, CLEAN_DATA_PATH)
+    l1_ok = load_to_parquet(df, table_name, CLEAN_DATA_PATH)
     
     # L2: Cargar a SQL Server
+    l2_ok = False
     conn = get_db_connection()
     if conn:
-        load_to_sql_server(df, table_name, conn)
+        l2_ok = load_to_sql_server(df, table_name, conn, governor)
         conn.close()
     
     print("--- CARGA (L) FINALIZADA ---")
+    return l1_ok and l2_ok
 
 # --- FIN DEL ARCHIVO src/loader.py ---
\ No newline at end of file
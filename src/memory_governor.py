@@ -0,0 +1,115 @@
+# --- INICIO DEL ARCHIVO src/memory_governor.py ---
+import gc
+import os
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:  # psutil es opcional: en Linux se usa /proc como respaldo
+    psutil = None
+
+# ==============================================================================
+# CONFIGURACIÓN DEL GOBERNADOR DE MEMORIA
+# ==============================================================================
+# Alcance: en la ejecución secuencial (analyzer.main por defecto y pipeline_master)
+# el gobernador reduce los intermedios de lectura, transformación y carga, pero la
+# tabla completa sigue en memoria (salida de la extracción y de la transformación a
+# la vez). Solo el modo segmentado (stage_pipeline.py) mantiene la memoria acotada
+# para tablas más grandes que la RAM.
+
+# Presupuesto de RSS para todo el proceso (equipo de 32 GB: se deja margen al SO)
+DEFAULT_MEMORY_BUDGET_BYTES = 24 * 1024 ** 3
+
+# A partir de esta fracción del presupuesto se empiezan a reducir los bloques
+SOFT_LIMIT_RATIO = 0.6
+
+# Factor mínimo de reducción de bloques al llegar al presupuesto
+MIN_SCALE = 0.05
+
+# Tamaño mínimo de los rangos de bytes que se leen del archivo fuente
+MIN_CHUNK_BYTES = 1024 * 1024
+
+
+def get_process_rss() -> Optional[int]:
+    """Devuelve el RSS actual del proceso en bytes, o None si no es medible."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _fmt_gb(n_bytes: int) -> str:
+    return f"{n_bytes / 1024 ** 3:.1f} GB"
+
+
+class MemoryGovernor:
+    """
+    Observa el RSS del proceso durante la corrida y ajusta el tamaño de los
+    bloques del extractor, las transformaciones y el cargador SQL.
+
+    Por debajo de 'soft_limit_ratio * budget' los bloques usan su tamaño base;
+    entre ese umbral y el presupuesto se reducen linealmente hasta 'min_scale'.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+                 soft_limit_ratio: float = SOFT_LIMIT_RATIO, min_scale: float = MIN_SCALE):
+        self.budget_bytes = budget_bytes
+        self.soft_limit_bytes = int(budget_bytes * soft_limit_ratio)
+        self.min_scale = min_scale
+        self.peak_rss = 0
+
+        if get_process_rss() is None:
+            print("  -> ⚠️ Gobernador de memoria: no se puede medir el RSS (instale psutil). Bloques sin ajuste.")
+
+    def rss(self) -> Optional[int]:
+        rss = get_process_rss()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def scale(self) -> float:
+        """Factor (min_scale..1.0) a aplicar sobre los tamaños base de bloque."""
+        rss = self.rss()
+        if rss is None or rss <= self.soft_limit_bytes:
+            return 1.0
+        if rss >= self.budget_bytes:
+            return self.min_scale
+        used = (rss - self.soft_limit_bytes) / (self.budget_bytes - self.soft_limit_bytes)
+        return max(self.min_scale, 1.0 - used * (1.0 - self.min_scale))
+
+    def under_pressure(self) -> bool:
+        return self.scale() < 1.0
+
+    def chunk_rows(self, base_rows: int, min_rows: int = 1_000) -> int:
+        """Tamaño de bloque (filas) ajustado a la memoria disponible."""
+        return max(min_rows, int(base_rows * self.scale()))
+
+    def chunk_bytes(self, base_bytes: int, min_bytes: int = MIN_CHUNK_BYTES) -> int:
+        """Tamaño de rango de lectura (bytes) ajustado a la memoria disponible."""
+        return max(min_bytes, int(base_bytes * self.scale()))
+
+    def admit_without_waiting(self, label: str) -> None:
+        """
+        No bloquea: la tabla siempre arranca de inmediato. Las tablas se procesan una a la vez: no
+        hay otro trabajo que pueda liberar memoria, y el asignador suele retener la
+        de la tabla anterior aunque ya no se use. Si el RSS sigue sobre el umbral,
+        la tabla simplemente arranca con bloques reducidos (ver scale()).
+        """
+        rss = self.rss()
+        if rss is None or rss <= self.soft_limit_bytes:
+            return
+
+        gc.collect()
+        rss = self.rss()
+        if rss is not None and rss > self.soft_limit_bytes:
+            print(f"  -> ⚠️ Memoria en {_fmt_gb(rss)} (umbral {_fmt_gb(self.soft_limit_bytes)}). "
+                  f"Iniciando {label} con bloques al {self.scale():.0%} del tamaño base.")
+
+    def report(self) -> None:
+        print(f"  -> Pico de memoria (RSS): {_fmt_gb(self.peak_rss)} de {_fmt_gb(self.budget_bytes)} presupuestados.")
+
+# --- FIN DEL ARCHIVO src/memory_governor.py ---
@@ -0,0 +1,243 @@
+# --- INICIO DEL ARCHIVO src/pipeline_master.py ---
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any
+import polars as pl
+
+current_dir = Path(__file__).resolve().parent
+sys.path.append(current_dir.as_posix())
+
+from extractor import extract_from_file, get_file_paths
+from transformer import apply_transformation
+from loader import apply_loading
+from memory_governor import MemoryGovernor
+from analyzer import (
+    analyze_data_quality, ROOT_DATA_PATH, REPORTS_DIR, BASE_DIR,
+    TABLES_TO_PROCESS, EXTRACT_CLOB_SIDECAR, MEMORY_BUDGET_BYTES,
+)
+
+# ==============================================================================
+# CONFIGURACIÓN DEL CACHÉ DE ETAPAS
+# ==============================================================================
+# Cada etapa guarda su salida en data/cache/<etapa>/<TABLA>-<llave>.<ext>, donde la
+# llave es un hash de: el código de los módulos de la etapa, su configuración y las
+# llaves de las etapas de las que depende. Si nada de eso cambia, la salida se reusa.
+CACHE_DIR = BASE_DIR / 'data' / 'cache'
+
+# Los intermedios se comprimen con lz4: se escriben y leen más rápido que zstd
+CACHE_COMPRESSION = "lz4"
+
+
+def _hash_file(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _source_fingerprint(table_name: str) -> Dict[str, Any]:
+    """
+    Huella del archivo fuente. Se usa tamaño + fecha de modificación en lugar de
+    un hash del contenido, para no leer desde la red varios GB solo para validar.
+    """
+    file_path = get_file_paths(table_name, ROOT_DATA_PATH)
+    if not file_path:
+        raise FileNotFoundError(f"No se encontró el archivo para '{table_name}'.")
+    stat = file_path.stat()
+    return {'path': file_path.as_posix(), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+# ==============================================================================
+# DEFINICIÓN DEL DAG DE ETAPAS
+# ==============================================================================
+
+class Stage:
+    """Una etapa del pipeline de una tabla, con sus dependencias y su código."""
+
+    def __init__(self, name: str, deps: List[str], code_files: List[str],
+                 run: Callable[..., Any], output_ext: str = 'parquet',
+                 config: Optional[Callable[[str], Dict[str, Any]]] = None):
+        self.name = name
+        self.deps = deps
+        self.code_files = code_files
+        self.run = run
+        self.output_ext = output_ext
+        self.config = config
+
+
+def _run_extract(table_name: str, governor: MemoryGovernor) -> pl.DataFrame:
+    return extract_from_file(table_name, ROOT_DATA_PATH, extract_clobs=EXTRACT_CLOB_SIDECAR, governor=governor)
+
+
+def _run_transform(table_name: str, governor: MemoryGovernor, extract: pl.DataFrame) -> pl.DataFrame:
+    print(f"--- INICIANDO TRANSFORMACIÓN para {table_name} ---")
+    df = apply_transformation(table_name, extract, governor)
+    print("--- TRANSFORMACIÓN FINALIZADA ---")
+    return df
+
+
+def _run_profile(table_name: str, governor: MemoryGovernor, transform: pl.DataFrame) -> pl.DataFrame:
+    return analyze_data_quality(transform, table_name, REPORTS_DIR)
+
+
+def _run_load(table_name: str, governor: MemoryGovernor, transform: pl.DataFrame) -> Dict[str, Any]:
+    # Si la carga falla no se escribe el marcador, para que se reintente en la próxima corrida
+    if not apply_loading(table_name, transform, governor):
+        raise RuntimeError(f"La carga (L) de {table_name} no se completó.")
+    return {'rows': transform.shape[0]}
+
+
+# Orden topológico: cada etapa aparece después de sus dependencias
+STAGES: List[Stage] = [
+    Stage('extract', [], ['extractor.py', 'clob_store.py', 'hybrid_reader.py', 'tar_source.py'], _run_extract,
+          config=lambda t: {'source': _source_fingerprint(t), 'extract_clobs': EXTRACT_CLOB_SIDECAR}),
+    Stage('transform', ['extract'], ['transformer.py'], _run_transform),
+    Stage('profile', ['transform'], ['analyzer.py'], _run_profile),
+    # La carga es un efecto lateral (Parquet limpio + SQL Server): solo se guarda un marcador
+    Stage('load', ['transform'], ['loader.py'], _run_load, output_ext='json'),
+]
+STAGES_BY_NAME: Dict[str, Stage] = {stage.name: stage for stage in STAGES}
+
+
+# ==============================================================================
+# EJECUCIÓN CON CACHÉ
+# ==============================================================================
+
+class TablePipeline:
+    """Resuelve el DAG de una tabla, reusando las salidas en caché que sigan vigentes."""
+
+    def __init__(self, table_name: str, governor: MemoryGovernor, force: Optional[List[str]] = None):
+        self.table_name = table_name
+        self.governor = governor
+        self.force = set(force or [])
+        self._keys: Dict[str, str] = {}
+        self._outputs: Dict[str, Any] = {}
+        self._code_hashes: Dict[str, str] = {}
+
+    def stage_key(self, stage_name: str) -> str:
+        if stage_name in self._keys:
+            return self._keys[stage_name]
+
+        stage = STAGES_BY_NAME[stage_name]
+        for code_file in stage.code_files:
+            if code_file not in self._code_hashes:
+                self._code_hashes[code_file] = _hash_file(current_dir / code_file)
+
+        key_material = {
+            'stage': stage.name,
+            'table': self.table_name,
+            'code': {f: self._code_hashes[f] for f in stage.code_files},
+            'config': stage.config(self.table_name) if stage.config else {},
+            'deps': {dep: self.stage_key(dep) for dep in stage.deps},
+        }
+        digest = hashlib.sha256(json.dumps(key_material, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        self._keys[stage_name] = digest
+        return digest
+
+    def output_path(self, stage_name: str) -> Path:
+        stage = STAGES_BY_NAME[stage_name]
+        return CACHE_DIR / stage.name / f"{self.table_name}-{self.stage_key(stage_name)}.{stage.output_ext}"
+
+    def is_cached(self, stage_name: str) -> bool:
+        return stage_name not in self.force and self.output_path(stage_name).exists()
+
+    def _read_output(self, stage_name: str) -> Any:
+        path = self.output_path(stage_name)
+        if path.suffix == '.json':
+            return json.loads(path.read_text(encoding='utf-8'))
+        return pl.read_parquet(path.as_posix())
+
+    def _write_output(self, stage_name: str, output: Any) -> None:
+        path = self.output_path(stage_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Se guarda con nombre temporal y se renombra: una corrida interrumpida
+        # nunca deja una salida a medias que parezca válida
+        tmp_path = path.with_name(path.name + '.tmp')
+        if isinstance(output, pl.DataFrame):
+            output.write_parquet(tmp_path.as_posix(), compression=CACHE_COMPRESSION)
+        else:
+            tmp_path.write_text(json.dumps(output), encoding='utf-8')
+        tmp_path.replace(path)
+
+        # Las versiones anteriores de esta etapa para esta tabla ya no son vigentes
+        for old_path in path.parent.glob(f"{self.table_name}-*.{path.suffix.lstrip('.')}"):
+            if old_path != path:
+                old_path.unlink()
+
+    def resolve(self, stage_name: str) -> Any:
+        """Devuelve la salida de la etapa, ejecutándola solo si su caché no es vigente."""
+        if stage_name in self._outputs:
+            return self._outputs[stage_name]
+
+        stage = STAGES_BY_NAME[stage_name]
+        if self.is_cached(stage_name):
+            print(f"  -> ♻️ [{stage.name}] caché vigente ({self.stage_key(stage_name)}).")
+            output = self._read_output(stage_name) if self._needed_downstream(stage_name) else None
+        else:
+            print(f"  -> ▶️ [{stage.name}] ejecutando ({self.stage_key(stage_name)})...")
+            dep_outputs = {dep: self.resolve(dep) for dep in stage.deps}
+            output = stage.run(self.table_name, self.governor, **dep_outputs)
+            self._write_output(stage_name, output)
+
+        self._outputs[stage_name] = output
+        return output
+
+    def _needed_downstream(self, stage_name: str) -> bool:
+        """Una salida en caché solo se lee si alguna etapa dependiente debe ejecutarse."""
+        return any(
+            stage_name in stage.deps and not self.is_cached(stage.name)
+            for stage in STAGES
+        )
+
+    def plan(self) -> Dict[str, bool]:
+        """Indica, por etapa, si se ejecutará (True) o se reusará de la caché (False)."""
+        return {stage.name: not self.is_cached(stage.name) for stage in STAGES}
+
+    def run(self) -> None:
+        for stage in STAGES:
+            self.resolve(stage.name)
+
+
+# ==============================================================================
+# FUNCIÓN PRINCIPAL
+# ==============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Pipeline SIGER con DAG de etapas y caché de intermedios.")
+    parser.add_argument('tables', nargs='*', default=TABLES_TO_PROCESS, help="Tablas a procesar.")
+    parser.add_argument('--force', nargs='+', default=[], choices=[s.name for s in STAGES],
+                        help="Etapas a re-ejecutar aunque su caché sea vigente.")
+    parser.add_argument('--dry-run', action='store_true', help="Solo muestra qué etapas se ejecutarían.")
+    args = parser.parse_args(argv)
+
+    print("--- INICIANDO PIPELINE ETL Y QA (DAG CON CACHÉ) ---")
+    governor = MemoryGovernor(MEMORY_BUDGET_BYTES)
+
+    for table_name in args.tables:
+        print("\n" + "=" * 55)
+        print(f"| 📊 Procesando Tabla: {table_name}")
+        print("=" * 55)
+
+        try:
+            pipeline = TablePipeline(table_name, governor, force=args.force)
+            if args.dry_run:
+                for stage_name, will_run in pipeline.plan().items():
+                    print(f"  -> [{stage_name}] {'EJECUTAR' if will_run else 'caché'}")
+                continue
+
+            governor.admit_without_waiting(table_name)
+            pipeline.run()
+            print(f"| ✅ Pipeline finalizado para {table_name}.")
+
+        except Exception as e:
+            print(f"| ❌ FALLO CRÍTICO en el Pipeline para {table_name}. Mensaje:")
+            print(f"'{e}'")
+            print("=" * 55)
+
+    governor.report()
+    print("\n--- PIPELINE COMPLETO FINALIZADO ---")
+
+if __name__ == '__main__':
+    main()
+# --- FIN DEL ARCHIVO src/pipeline_master.py ---
@@ -0,0 +1,222 @@
+# --- INICIO DEL ARCHIVO src/stage_pipeline.py ---
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import polars as pl
+
+from extractor import iter_extract_chunks
+from transformer import apply_transformation
+from loader import get_db_connection, insert_rows
+from memory_governor import MemoryGovernor
+
+# ==============================================================================
+# CONFIGURACIÓN DEL MODO SEGMENTADO (PIPELINING)
+# ==============================================================================
+# Extracción, transformación, escritura Parquet y carga SQL corren como hilos
+# concurrentes unidos por colas acotadas. Cuando una cola se llena, la etapa
+# anterior se bloquea (contrapresión): la memoria en vuelo queda limitada a
+# PIPELINE_QUEUE_SIZE bloques por cola y el tiempo total se acerca al de la
+# etapa más lenta. Polars y pyodbc liberan el GIL en su trabajo pesado.
+#
+# Publicación coordinada: L1 deja el Parquet consolidado en un archivo temporal y
+# L2 solo confirma la transacción cuando ese archivo está listo; L1 reemplaza
+# <TABLA>.parquet solo después de la confirmación. Si una etapa falla antes, no se
+# publica ninguna de las dos cargas. Queda una ventana mínima: si el renombrado del
+# Parquet falla después del COMMIT, SQL Server conserva la carga sin el Parquet nuevo.
+PIPELINE_QUEUE_SIZE = 4
+
+# Intervalo (segundos) con el que las etapas bloqueadas revisan si hay que cancelar
+_POLL_SECONDS = 0.5
+
+_END = object()
+
+
+class _Cancelled(Exception):
+    """Otra etapa falló: esta etapa debe terminar sin procesar más bloques."""
+
+
+class _StageRunner:
+    """Hilos, colas y cancelación compartida de una corrida segmentada."""
+
+    def __init__(self):
+        self.cancel = threading.Event()
+        self.errors: List[Tuple[str, BaseException]] = []
+        self._threads: List[threading.Thread] = []
+
+    def put(self, q: queue.Queue, item: Any) -> None:
+        while True:
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                if self.cancel.is_set():
+                    raise _Cancelled()
+
+    def get(self, q: queue.Queue) -> Any:
+        while True:
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self.cancel.is_set():
+                    raise _Cancelled()
+
+    def wait(self, event: threading.Event) -> None:
+        """Espera a que otra etapa marque 'event', salvo que la corrida se cancele."""
+        while not event.wait(timeout=_POLL_SECONDS):
+            if self.cancel.is_set():
+                raise _Cancelled()
+
+    def start(self, name: str, target: Callable[[], None]) -> None:
+        def run():
+            try:
+                target()
+            except _Cancelled:
+                pass
+            except BaseException as e:
+                self.errors.append((name, e))
+                self.cancel.set()
+
+        thread = threading.Thread(target=run, name=f"etapa-{name}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+        if self.errors:
+            name, error = self.errors[0]
+            raise RuntimeError(f"Falló la etapa '{name}': {error}") from error
+
+
+# ==============================================================================
+# EJECUCIÓN SEGMENTADA DE UNA TABLA
+# ==============================================================================
+
+def run_pipelined(table_name: str, root_path: Path, clean_data_path: Path, extract_clobs: bool = False,
+                  governor: Optional[MemoryGovernor] = None) -> Tuple[List[Tuple[str, str, int]], int]:
+    """
+    Ejecuta E -> T -> {L1 Parquet, L2 SQL Server} por bloques y en paralelo.
+    Devuelve (columna, tipo, nulos) por columna y el total de filas, acumulados
+    durante la transformación para generar el reporte EDA sin releer la tabla.
+    """
+    print(f"--- INICIANDO EJECUCIÓN SEGMENTADA para {table_name} ---")
+    runner = _StageRunner()
+    q_transform: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    q_parquet: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    q_sql: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    profile: Dict[str, Any] = {'rows': 0, 'dtypes': {}, 'nulls': {}}
+    staging_dir = clean_data_path / f"_staging_{table_name}"
+    l1_ready = threading.Event()     # Parquet consolidado en el archivo temporal
+    l2_committed = threading.Event()  # Transacción de SQL Server confirmada
+
+    # --- E: extracción por bloques
+    def extract_stage():
+        for chunk in iter_extract_chunks(table_name, root_path, extract_clobs, governor):
+            runner.put(q_transform, chunk)
+        runner.put(q_transform, _END)
+
+    # --- T: transformación + perfil de nulos, con salida hacia ambas cargas
+    def transform_stage():
+        while True:
+            chunk = runner.get(q_transform)
+            if chunk is _END:
+                break
+            chunk = apply_transformation(table_name, chunk)
+
+            if not profile['dtypes']:
+                profile['dtypes'] = {col: str(dtype) for col, dtype in chunk.schema.items()}
+            for col, n_nulls in zip(chunk.columns, chunk.null_count().row(0)):
+                profile['nulls'][col] = profile['nulls'].get(col, 0) + n_nulls
+            profile['rows'] += chunk.shape[0]
+
+            # Un objeto por consumidor: write_parquet toma el objeto de Rust en préstamo
+            # mutable (PyO3), y leerlo a la vez desde el hilo SQL falla con 'Already
+            # mutably borrowed'. clone() comparte los buffers de Arrow, no los copia.
+            runner.put(q_parquet, chunk)
+            runner.put(q_sql, chunk.clone())
+        runner.put(q_parquet, _END)
+        runner.put(q_sql, _END)
+
+    # --- L1: un archivo Parquet por bloque; al final se consolidan en <TABLA>.parquet
+    def parquet_stage():
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        staging_dir.mkdir(parents=True)
+        file_path = clean_data_path / f"{table_name}.parquet"
+        tmp_path = clean_data_path / f"{table_name}.parquet.tmp"
+        n_parts = 0
+        try:
+            # Los bloques vacíos también se escriben: una tabla sin registros publica un
+            # Parquet vacío con su esquema en lugar de dejar el de la corrida anterior
+            while True:
+                chunk = runner.get(q_parquet)
+                if chunk is _END:
+                    break
+                chunk.write_parquet((staging_dir / f"part-{n_parts:05d}.parquet").as_posix(), compression="zstd")
+                n_parts += 1
+
+            if not n_parts:
+                raise RuntimeError(f"La extracción de {table_name} no entregó ningún bloque (ni siquiera vacío).")
+            pl.scan_parquet((staging_dir / 'part-*.parquet').as_posix()).sink_parquet(tmp_path.as_posix(), compression="zstd")
+            l1_ready.set()
+            runner.wait(l2_committed)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        tmp_path.replace(file_path)
+        shutil.rmtree(staging_dir)
+        print(f"  -> ✅ Carga L1 exitosa: {n_parts} bloques consolidados en {file_path.as_posix()}")
+
+    # --- L2: inserción por bloques en una sola transacción
+    def sql_stage():
+        conn = get_db_connection()
+        cursor = conn.cursor() if conn else None
+        total_rows = 0
+        try:
+            while True:
+                chunk = runner.get(q_sql)
+                if chunk is _END:
+                    break
+                # Sin conexión se siguen consumiendo bloques para no frenar a las demás etapas
+                if cursor is not None:
+                    total_rows += insert_rows(cursor, chunk, table_name, governor)
+            if conn:
+                # Confirmar solo cuando el Parquet esté listo para publicarse
+                runner.wait(l1_ready)
+                conn.commit()
+                print(f"  -> ✅ Carga L2 a SQL Server exitosa: {total_rows} filas insertadas en {table_name}.")
+            # Sin conexión, L1 se publica igual que en la carga no segmentada
+            l2_committed.set()
+        except _Cancelled:
+            if conn:
+                conn.rollback()
+                print(f"  -> Carga L2 de {table_name} cancelada por fallo en otra etapa. Transacción revertida.")
+            raise
+        except BaseException as e:
+            if conn:
+                conn.rollback()
+            print(f"  -> ❌ FALLO en la inserción masiva a {table_name}. ERROR SQL Server/ODBC: {str(e)}")
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    clean_data_path.mkdir(parents=True, exist_ok=True)
+    runner.start('extraccion', extract_stage)
+    runner.start('transformacion', transform_stage)
+    runner.start('parquet', parquet_stage)
+    runner.start('sql', sql_stage)
+    runner.join()
+
+    column_stats = [(col, dtype, profile['nulls'].get(col, 0)) for col, dtype in profile['dtypes'].items()]
+    print(f"--- EJECUCIÓN SEGMENTADA FINALIZADA: {profile['rows']} filas ---")
+    return column_stats, profile['rows']
+
+# --- FIN DEL ARCHIVO src/stage_pipeline.py ---
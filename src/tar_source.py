@@ -0,0 +1,177 @@
+# --- INICIO DEL ARCHIVO src/tar_source.py ---
+import io
+import json
+import hashlib
+import tarfile
+from pathlib import Path, PurePosixPath
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple, Union
+
+# ==============================================================================
+# CONFIGURACIÓN DE FUENTES EN ARCHIVO TAR
+# ==============================================================================
+# La entrega llega como 'entrega_siger.tar'. Si la ruta raíz de datos pasa por un
+# .tar (opcionalmente comprimido con gzip), las tablas se leen como flujos desde
+# los miembros del archivo, sin desempacarlo a disco.
+ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TAR_INDEX_CACHE_DIR = BASE_DIR / 'data' / 'cache' / 'tar_index'
+
+# Tamaño del búfer de lectura sobre el miembro (lecturas secuenciales grandes en red)
+STREAM_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Índices ya cargados en este proceso: {(ruta, tamaño, mtime): {miembro: metadatos}}
+_INDEX_CACHE: Dict[Tuple[str, int, int], Dict[str, Dict[str, int]]] = {}
+
+
+def split_archive_path(root_path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Separa una ruta como '.../entrega_siger.tar/entrega_siger/.../tables_siger' en
+    (ruta del archivo tar, prefijo interno). Devuelve None si no pasa por un tar.
+    """
+    parts = root_path.parts
+    for i in range(len(parts)):
+        candidate = Path(*parts[:i + 1])
+        if candidate.name.lower().endswith(ARCHIVE_SUFFIXES) and candidate.is_file():
+            return candidate, '/'.join(parts[i + 1:])
+    return None
+
+
+def _normalize_member_name(name: str) -> str:
+    return PurePosixPath(name[2:] if name.startswith('./') else name).as_posix()
+
+
+def get_member_index(archive_path: Path) -> Dict[str, Dict[str, int]]:
+    """
+    Índice {nombre del miembro: {size, offset_data, mtime}} del archivo tar.
+    Se construye una sola vez (recorriendo las cabeceras) y se guarda en disco;
+    se reconstruye solo si el tar cambia de tamaño o fecha de modificación.
+    """
+    stat = archive_path.stat()
+    cache_key = (archive_path.as_posix(), stat.st_size, stat.st_mtime_ns)
+    if cache_key in _INDEX_CACHE:
+        return _INDEX_CACHE[cache_key]
+
+    path_hash = hashlib.sha256(archive_path.as_posix().encode('utf-8')).hexdigest()[:16]
+    index_file = TAR_INDEX_CACHE_DIR / f"{path_hash}.json"
+    if index_file.exists():
+        cached = json.loads(index_file.read_text(encoding='utf-8'))
+        if cached.get('size') == stat.st_size and cached.get('mtime') == stat.st_mtime_ns:
+            _INDEX_CACHE[cache_key] = cached['members']
+            return cached['members']
+
+    print(f"  -> Construyendo índice de miembros de {archive_path.name} (solo la primera vez)...")
+    members: Dict[str, Dict[str, int]] = {}
+    with tarfile.open(archive_path.as_posix(), mode='r:*') as tar:
+        for info in tar:
+            if info.isfile():
+                members[_normalize_member_name(info.name)] = {
+                    'size': info.size, 'offset_data': info.offset_data, 'mtime': int(info.mtime),
+                }
+
+    TAR_INDEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    index_file.write_text(
+        json.dumps({'archive': archive_path.as_posix(), 'size': stat.st_size,
+                    'mtime': stat.st_mtime_ns, 'members': members}),
+        encoding='utf-8',
+    )
+    print(f"  -> Índice guardado: {len(members)} archivos en {archive_path.name}.")
+    _INDEX_CACHE[cache_key] = members
+    return members
+
+
+# ==============================================================================
+# MIEMBRO DEL TAR COMO ARCHIVO FUENTE
+# ==============================================================================
+
+class _MemberRawIO(io.RawIOBase):
+    """Flujo de un miembro del tar; al cerrarse también cierra el archivo tar."""
+
+    def __init__(self, tar: tarfile.TarFile, member_file: io.BufferedReader):
+        self._tar = tar
+        self._member_file = member_file
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self._member_file.readinto(buffer)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._member_file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._member_file.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._member_file.close()
+            self._tar.close()
+        super().close()
+
+
+class TarMember:
+    """
+    Archivo de tabla dentro del tar. Expone lo que el extractor usa de un Path
+    (name, suffix, stem, as_posix, stat, open) para que ambos sean intercambiables.
+    """
+
+    def __init__(self, archive_path: Path, member_name: str, size: int, offset_data: int, mtime: int):
+        self.archive_path = archive_path
+        self.member_name = member_name
+        self.size = size
+        self.offset_data = offset_data
+        self.mtime = mtime
+
+        member_path = PurePosixPath(member_name)
+        self.name = member_path.name
+        self.suffix = member_path.suffix
+        self.stem = member_path.stem
+
+    def as_posix(self) -> str:
+        return f"{self.archive_path.as_posix()}::{self.member_name}"
+
+    def stat(self) -> SimpleNamespace:
+        return SimpleNamespace(st_size=self.size, st_mtime_ns=self.mtime * 1_000_000_000)
+
+    def open(self, mode: str = 'rb') -> io.BufferedReader:
+        """
+        Abre el miembro como flujo binario. En un tar sin comprimir el acceso es
+        directo al desplazamiento del miembro (el índice evita recorrer cabeceras);
+        en .tar.gz la descompresión avanza hasta él.
+        """
+        if mode != 'rb':
+            raise ValueError("Los miembros del tar solo se pueden abrir en modo 'rb'.")
+
+        tar = tarfile.open(self.archive_path.as_posix(), mode='r:*')
+        info = tarfile.TarInfo(self.member_name)
+        info.size = self.size
+        info.offset_data = self.offset_data
+        info.type = tarfile.REGTYPE
+        member_file = tar.extractfile(info)
+        return io.BufferedReader(_MemberRawIO(tar, member_file), buffer_size=STREAM_BUFFER_SIZE)
+
+    def __repr__(self) -> str:
+        return f"TarMember({self.as_posix()!r})"
+
+
+# Un archivo fuente de tabla: ruta en disco o miembro de un tar
+SourceFile = Union[Path, TarMember]
+
+
+def find_table_member(table_name: str, archive_path: Path, inner_prefix: str) -> Optional[TarMember]:
+    """Busca '<prefijo>/<tabla>.csv' o '.txt' en el índice del tar."""
+    index = get_member_index(archive_path)
+    prefix = f"{inner_prefix.strip('/')}/" if inner_prefix.strip('/') else ''
+    for suffix in ('.csv', '.txt'):
+        member_name = f"{prefix}{table_name}{suffix}"
+        if member_name in index:
+            meta = index[member_name]
+            return TarMember(archive_path, member_name, meta['size'], meta['offset_data'], meta['mtime'])
+    return None
+
+# --- FIN DEL ARCHIVO src/tar_source.py ---
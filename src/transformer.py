@@ -1,6 +1,11 @@
 # --- INICIO DEL ARCHIVO src/transformer.py ---
 import polars as pl
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from memory_governor import MemoryGovernor
+
+# Filas por bloque al transformar bajo presión de memoria
+TRANSFORM_BATCH_ROWS = 2_000_000
 
 # Columnas identificadas con 100% de nulos o irrelevantes, listas para ser descartadas.
 COLUMNS_TO_DROP: Dict[str, List[str]] = {
@@ -100,8 +105,7 @@ TRANSFORM_FUNCTIONS: Dict[str, Any] = {
     'CTSOCIOS': transform_ctsocios,
 }
 
-def apply_transformation(table_name: str, df: pl.DataFrame) -> pl.DataFrame:
-    """Dirige la transformación al motor de limpieza específico o al motor por defecto."""
+def _transform_frame(table_name: str, df: pl.DataFrame) -> pl.DataFrame:
     transform_func = TRANSFORM_FUNCTIONS.get(table_name, transform_default)
     
     if transform_func == transform_default:
@@ -109,3 +113,23 @@ def apply_transformation(table_name: str, df: pl.DataFrame) -> pl.DataFrame:
     else:
         return transform_func(df)
 
+
+def apply_transformation(table_name: str, df: pl.DataFrame, governor: Optional[MemoryGovernor] = None) -> pl.DataFrame:
+    """
+    Dirige la transformación al motor de limpieza específico o al motor por defecto.
+    Bajo presión de memoria las transformaciones (todas fila a fila) se aplican por
+    bloques, para que las copias intermedias de cada columna sean de un bloque y no
+    de la tabla completa. La entrada y la salida completas siguen coexistiendo en
+    memoria (el llamador conserva 'df'); para acotar eso use el modo segmentado.
+    """
+    if governor is None or not governor.under_pressure():
+        return _transform_frame(table_name, df)
+
+    batch_rows = governor.chunk_rows(TRANSFORM_BATCH_ROWS)
+    if df.shape[0] <= batch_rows:
+        return _transform_frame(table_name, df)
+
+    print(f"  -> Transformando por bloques de {batch_rows} filas (presión de memoria)...")
+    frames = [_transform_frame(table_name, chunk) for chunk in df.iter_slices(n_rows=batch_rows)]
+    return pl.concat(frames, how="vertical", rechunk=False)
+